@@ -0,0 +1,89 @@
+"""
+Per-request auth/session cost for logged-in page views, and login_view cost.
+
+Compares the stock DB session + AuthenticationMiddleware profile with the
+cached_db and signed_cookies profiles behind CachedUserAuthenticationMiddleware,
+then times POST /login/ under PBKDF2 and the fast test hasher.
+
+    python -m benchmarks.bench_auth --books 2000
+"""
+
+import argparse
+import statistics
+import time
+
+from benchmarks.common import percentile, seed_catalog, setup_django
+
+STOCK_AUTH = 'django.contrib.auth.middleware.AuthenticationMiddleware'
+CACHED_AUTH = 'books.middleware.CachedUserAuthenticationMiddleware'
+
+PROFILES = [
+    ('db + stock auth', 'django.contrib.sessions.backends.db', STOCK_AUTH),
+    ('cached_db + cached user', 'django.contrib.sessions.backends.cached_db', CACHED_AUTH),
+    ('signed_cookies + cached user', 'django.contrib.sessions.backends.signed_cookies', CACHED_AUTH),
+]
+
+HASHERS = [
+    ('PBKDF2', ['django.contrib.auth.hashers.PBKDF2PasswordHasher']),
+    ('MD5 (test profile)', ['django.contrib.auth.hashers.MD5PasswordHasher']),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--books', type=int, default=2000)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--logins', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test import Client, override_settings
+    from django.test.utils import CaptureQueriesContext
+
+    seed_catalog(args.books)
+    user = User.objects.create_user('bench-reader', password='bench-password-1')
+
+    print(f"{'profile':<32} {'auth+session queries':>20} {'p50 ms':>8} {'p99 ms':>8}")
+    for label, engine, auth_middleware in PROFILES:
+        middleware = [auth_middleware if m == CACHED_AUTH else m for m in settings.MIDDLEWARE]
+        with override_settings(SESSION_ENGINE=engine, MIDDLEWARE=middleware):
+            client = Client()
+            client.force_login(user)
+            client.get('/dashboard/')
+
+            samples = []
+            auth_queries = 0
+            for _ in range(args.requests):
+                started = time.perf_counter()
+                with CaptureQueriesContext(connection) as queries:
+                    client.get('/dashboard/')
+                samples.append((time.perf_counter() - started) * 1000)
+                auth_queries += sum(
+                    1 for q in queries.captured_queries
+                    if '"django_session"' in q['sql'] or 'FROM "auth_user"' in q['sql']
+                )
+        print(
+            f"{label:<32} {auth_queries / args.requests:>20.2f} "
+            f"{statistics.median(samples):>8.2f} {percentile(samples, 99):>8.2f}"
+        )
+
+    print()
+    for label, hashers in HASHERS:
+        with override_settings(PASSWORD_HASHERS=hashers):
+            user.set_password('bench-password-1')
+            user.save()
+            samples = []
+            for _ in range(args.logins):
+                client = Client()
+                started = time.perf_counter()
+                client.post('/login/', {'username': user.username, 'password': 'bench-password-1'})
+                samples.append((time.perf_counter() - started) * 1000)
+        print(f"POST /login/ {label:<22} p50 {statistics.median(samples):8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
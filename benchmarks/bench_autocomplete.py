@@ -0,0 +1,69 @@
+"""
+Latency and memory of the autocomplete prefix index at catalog scale.
+
+Builds a PrefixIndex from synthetic titles (no database needed) and times
+prefix lookups of varying selectivity.
+
+    python -m benchmarks.bench_autocomplete --titles 1000000
+"""
+
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+
+from benchmarks.common import WORDS, percentile
+from books.autocomplete import PrefixIndex
+
+
+def synthetic_titles(count, seed=0):
+    rng = random.Random(seed)
+    for pk in range(1, count + 1):
+        length = rng.randint(2, 6)
+        yield 'book', pk, " ".join(rng.choice(WORDS) for _ in range(length)).title()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--titles', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=5_000)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--budget-mb', type=int, default=512)
+    args = parser.parse_args()
+
+    index = PrefixIndex(memory_budget=args.budget_mb * 1024 * 1024)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    index.load(synthetic_titles(args.titles))
+    build_seconds = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"entries indexed:   {len(index):,}{' (truncated by budget)' if index.truncated else ''}")
+    print(f"build time:        {build_seconds:.2f}s")
+    print(f"estimated size:    {index.memory_used / 1024 / 1024:.1f} MiB (budget {args.budget_mb} MiB)")
+    print(f"traced memory:     {current / 1024 / 1024:.1f} MiB (peak {peak / 1024 / 1024:.1f} MiB)")
+
+    rng = random.Random(1)
+    for prefix_len in (1, 3, 6, 12):
+        prefixes = []
+        for _ in range(args.queries):
+            word = " ".join(rng.choice(WORDS) for _ in range(3))
+            prefixes.append(word[:prefix_len])
+        samples = []
+        for prefix in prefixes:
+            started = time.perf_counter()
+            index.search(prefix, limit=args.limit)
+            samples.append((time.perf_counter() - started) * 1000)
+        print(
+            f"prefix len {prefix_len:>2}:     "
+            f"p50 {statistics.median(samples):.3f} ms  "
+            f"p99 {percentile(samples, 99):.3f} ms  "
+            f"max {max(samples):.3f} ms"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Rows/sec of the /api/books/ serializer path vs. the values() + orjson fast path.
+
+    python -m benchmarks.bench_book_api --books 20000
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks.common import seed_catalog, setup_django
+
+
+def rate(label, pages, page_size, fn):
+    started = time.perf_counter()
+    for number in pages:
+        fn(number)
+    elapsed = time.perf_counter() - started
+    rows = len(pages) * page_size
+    print(f"{label:<28} {rows / elapsed:>12,.0f} rows/s  {elapsed / len(pages) * 1000:8.3f} ms/page")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--books', type=int, default=20_000)
+    parser.add_argument('--pages', type=int, default=300)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.conf import settings
+    from django.test import Client
+    from rest_framework.renderers import JSONRenderer
+
+    from books.models import Book
+    from books.serializers import BookSerializer, book_list_rows, dump_json
+
+    seed_catalog(args.books)
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    num_pages = args.books // page_size
+    rng = random.Random(0)
+    pages = [rng.randint(0, num_pages - 1) for _ in range(args.pages)]
+
+    objects = Book.objects.all().prefetch_related('authors')
+    rows = Book.objects.values_list('id', 'title', 'publication_year')
+    renderer = JSONRenderer()
+
+    def serializer_page(n):
+        page = objects[n * page_size:(n + 1) * page_size]
+        return renderer.render(BookSerializer(page, many=True).data)
+
+    def fast_page(n):
+        page = list(rows[n * page_size:(n + 1) * page_size])
+        return dump_json(book_list_rows(page))
+
+    rate('BookSerializer + JSONRenderer', pages, page_size, serializer_page)
+    rate('values() + dump_json', pages, page_size, fast_page)
+
+    client = Client()
+    for fast in (False, True):
+        settings.BOOK_API_FAST_PATH = fast
+        rate(
+            f"GET /api/books/ fast={fast}",
+            pages,
+            page_size,
+            lambda n: client.get('/api/books/', {'page': n + 1}, HTTP_ACCEPT='application/json'),
+        )
+
+
+if __name__ == '__main__':
+    main()
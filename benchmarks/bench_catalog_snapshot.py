@@ -0,0 +1,80 @@
+"""
+Card-page latency and memory: ORM path vs. the memory-mapped catalog snapshot.
+
+Seeds a throwaway SQLite database, then materializes the same random pages of
+book cards both ways and renders ``books/all_books.html`` for each.
+
+    python -m benchmarks.bench_catalog_snapshot --books 100000
+"""
+
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+
+from benchmarks.common import percentile, seed_catalog, setup_django, timed
+
+
+def measure(label, fetch_page, pages):
+    samples = []
+    tracemalloc.start()
+    for number in pages:
+        started = time.perf_counter()
+        cards = fetch_page(number)
+        for card in cards:
+            card.get_authors_display()
+        samples.append((time.perf_counter() - started) * 1000)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:<10} p50 {statistics.median(samples):7.3f} ms  "
+        f"p99 {percentile(samples, 99):7.3f} ms  "
+        f"peak alloc {peak / 1024:8.1f} KiB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--books', type=int, default=100_000)
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--per-page', type=int, default=12)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.conf import settings
+    from django.core.paginator import Paginator
+    from django.test import Client
+
+    from books import snapshot
+    from books.models import Book
+
+    with timed(f"seed {args.books:,} books"):
+        seed_catalog(args.books)
+    with timed("build snapshot"):
+        path = snapshot.build_snapshot()
+    print(f"snapshot size: {path.stat().st_size / 1024 / 1024:.1f} MiB")
+
+    orm_paginator = Paginator(Book.objects.all().prefetch_related('authors'), args.per_page)
+    snap_paginator = Paginator(snapshot.get_snapshot(), args.per_page)
+    rng = random.Random(0)
+    pages = [rng.randint(1, orm_paginator.num_pages) for _ in range(args.pages)]
+
+    measure('orm', lambda n: list(orm_paginator.page(n)), pages)
+    measure('snapshot', lambda n: list(snap_paginator.page(n)), pages)
+
+    client = Client()
+    for enabled in (False, True):
+        settings.CATALOG_SNAPSHOT_ENABLED = enabled
+        samples = []
+        for number in pages:
+            started = time.perf_counter()
+            client.get('/all-books/', {'page': number})
+            samples.append((time.perf_counter() - started) * 1000)
+        label = 'snapshot' if enabled else 'orm'
+        print(f"{label:<10} render /all-books/ p50 {statistics.median(samples):7.3f} ms  p99 {percentile(samples, 99):7.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Page weight and time-to-first-byte with and without the compression pipeline.
+
+Collects static files through the minifying/precompressing storage, then
+requests the public pages, the book API and every referenced asset with and
+without ``Accept-Encoding``.
+
+    python -m benchmarks.bench_compression --books 2000
+"""
+
+import argparse
+import re
+import statistics
+import time
+
+from benchmarks.common import seed_catalog, setup_django
+
+PAGES = ['/', '/authors/', '/all-books/', '/search/?q=the', '/api/books/?format=json']
+ASSET_PATTERN = re.compile(rb'(/static/[^"\']+)')
+
+
+def fetch(client, url, encoding, repeat):
+    headers = {'HTTP_ACCEPT_ENCODING': encoding} if encoding else {}
+    samples = []
+    response = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url, **headers)
+        if response.streaming:
+            body = b''.join(response.streaming_content)
+        else:
+            body = response.content
+        samples.append((time.perf_counter() - started) * 1000)
+    return response, body, statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--books', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django(PAGE_CACHE_TIMEOUT=0)
+
+    from django.core.management import call_command
+    from django.test import Client
+
+    seed_catalog(args.books)
+    call_command('collectstatic', interactive=False, verbosity=0)
+    client = Client()
+
+    print(f"{'url':<52} {'raw bytes':>10} {'sent bytes':>10} {'raw ms':>8} {'gzip ms':>8}")
+    assets = set()
+    totals = [0, 0]
+    for url in PAGES:
+        _, raw, raw_ms = fetch(client, url, None, args.repeat)
+        response, sent, gz_ms = fetch(client, url, 'gzip, br', args.repeat)
+        assets.update(m.decode() for m in ASSET_PATTERN.findall(raw))
+        totals[0] += len(raw)
+        totals[1] += len(sent)
+        print(f"{url:<52} {len(raw):>10,} {len(sent):>10,} {raw_ms:>8.2f} {gz_ms:>8.2f}  {response.get('Content-Encoding', '-')}")
+
+    for url in sorted(assets):
+        unhashed = re.sub(r'\.[0-9a-f]{12}(\.\w+)$', r'\1', url)
+        _, raw, raw_ms = fetch(client, unhashed, None, 1)
+        response, sent, gz_ms = fetch(client, url, 'gzip, br', args.repeat)
+        totals[0] += len(raw)
+        totals[1] += len(sent)
+        print(
+            f"{url:<52} {len(raw):>10,} {len(sent):>10,} {raw_ms:>8.2f} {gz_ms:>8.2f}  "
+            f"{response.get('Content-Encoding', '-')} {response.get('Cache-Control', '')}"
+        )
+
+    print(f"{'total page weight':<52} {totals[0]:>10,} {totals[1]:>10,}")
+
+
+if __name__ == '__main__':
+    main()
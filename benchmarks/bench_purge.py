@@ -0,0 +1,125 @@
+"""
+Deleting a heavy user: Django's cascading delete() versus purge.stream_delete().
+
+Reports wall time, peak Python memory (tracemalloc) and the longest time a
+concurrent writer had to wait for SQLite's write lock during the delete.
+
+    python -m benchmarks.bench_purge --comments 5000 --favorites 100
+"""
+
+import argparse
+import sqlite3
+import threading
+import time
+import tracemalloc
+
+from benchmarks.common import seed_catalog, setup_django
+
+
+class LockProbe(threading.Thread):
+    """
+    Repeatedly take and release the write lock from a second connection.
+
+    Polls every millisecond instead of using SQLite's busy handler, whose
+    growing back-off would miss the short gaps between chunk transactions.
+    """
+
+    def __init__(self, path):
+        super().__init__(daemon=True)
+        self.path = path
+        self.stop = threading.Event()
+        self.longest = 0.0
+
+    def run(self):
+        db = sqlite3.connect(self.path, timeout=0, isolation_level=None, check_same_thread=False)
+        started = time.perf_counter()
+        while not self.stop.is_set():
+            try:
+                db.execute('BEGIN IMMEDIATE')
+            except sqlite3.OperationalError:
+                self.longest = max(self.longest, time.perf_counter() - started)
+                time.sleep(0.001)
+                continue
+            db.execute('COMMIT')
+            self.longest = max(self.longest, time.perf_counter() - started)
+            time.sleep(0.002)
+            started = time.perf_counter()
+        db.close()
+
+
+def make_user(name, books, comments, favorites):
+    from django.contrib.auth.models import User
+    from books.models import Comment, Favorite
+
+    user = User.objects.create(username=name)
+    Comment.objects.bulk_create(
+        (Comment(user=user, book_id=books[i % len(books)], content=f'comment {i} ' * 8) for i in range(comments)),
+        batch_size=5000,
+    )
+    Favorite.objects.bulk_create(Favorite(user=user, book_id=book_id) for book_id in books[:favorites])
+    return user
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--books', type=int, default=2000)
+    parser.add_argument('--comments', type=int, default=5000)
+    parser.add_argument('--favorites', type=int, default=100)
+    parser.add_argument('--chunk-size', type=int, default=500)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.db import connections
+
+    # Same SQLite options as production.py, for every thread's connection.
+    connections.settings['default'].setdefault('OPTIONS', {}).update(
+        init_command='PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+        timeout=120,
+        transaction_mode='IMMEDIATE',
+    )
+    connections['default'].close()
+
+    from books.models import Book
+    from books.purge import stream_delete
+    from books.recommendations import rebuild_all
+    from books.stats import rollup
+
+    seed_catalog(args.books)
+    books = list(Book.objects.values_list('id', flat=True))
+
+    runs = [
+        ('delete()', lambda user: user.delete()),
+        ('stream_delete()', lambda user: stream_delete(user, args.chunk_size)),
+    ]
+
+    def prepare(name):
+        user = make_user(name, books, args.comments, args.favorites)
+        rebuild_all()
+        rollup()
+        return user
+
+    print(f"{'method':<16} {'seconds':>8} {'peak MiB':>9} {'longest lock wait ms':>21}")
+    for label, delete in runs:
+        # Timed with the probe running; tracemalloc slows Python several-fold,
+        # so peak memory comes from a second, separate run.
+        user = prepare(f'heavy-{label}')
+        probe = LockProbe(connections['default'].settings_dict['NAME'])
+        probe.start()
+        started = time.perf_counter()
+        delete(user)
+        elapsed = time.perf_counter() - started
+        probe.stop.set()
+        probe.join()
+
+        user = prepare(f'heavy-{label}-traced')
+        tracemalloc.start()
+        delete(user)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        print(f'{label:<16} {elapsed:>8.2f} {peak / 2**20:>9.1f} {probe.longest * 1000:>21.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Cost of /search/ on a cold cache versus repeated (and re-spelled) queries.
+
+Each query is searched once after clearing the cache, then again as typed
+with different case and spacing, which should share the cached result.
+
+    python -m benchmarks.bench_search --books 20000
+"""
+
+import argparse
+import statistics
+import time
+
+from benchmarks.common import WORDS, percentile, seed_catalog, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--books', type=int, default=20000)
+    parser.add_argument('--repeats', type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    seed_catalog(args.books)
+    client = Client()
+    queries = WORDS[:10]
+
+    print(f"{'query':<10} {'cold ms':>9} {'cold queries':>13} {'warm p50 ms':>12} {'warm p99 ms':>12} {'warm queries':>13}")
+    for word in queries:
+        cache.clear()
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as cold:
+            client.get('/search/', {'q': word})
+        cold_ms = (time.perf_counter() - started) * 1000
+
+        samples = []
+        warm_queries = 0
+        for i in range(args.repeats):
+            spelled = f'  {word.upper() if i % 2 else word.title()}  '
+            started = time.perf_counter()
+            with CaptureQueriesContext(connection) as warm:
+                client.get('/search/', {'q': spelled, 'page': i % 3 + 1})
+            samples.append((time.perf_counter() - started) * 1000)
+            warm_queries += len(warm)
+
+        print(
+            f"{word:<10} {cold_ms:>9.2f} {len(cold):>13} {statistics.median(samples):>12.2f} "
+            f"{percentile(samples, 99):>12.2f} {warm_queries / args.repeats:>13.2f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Startup time and per-worker memory of `manage.py serve`, with and without preload.
+
+Runs the production settings against a throwaway SQLite database, waits for
+the first successful response and then reads RSS/PSS of every worker from
+/proc (Linux only). PSS splits shared copy-on-write pages between the
+processes mapping them, so it drops when the app is preloaded.
+
+    python -m benchmarks.bench_serving --workers 4
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def memory_kib(pid):
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as fh:
+        for line in fh:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Pss:', 'Shared_Clean:', 'Shared_Dirty:', 'Private_Clean:', 'Private_Dirty:'):
+                values[parts[0].rstrip(':')] = int(parts[1])
+    return values
+
+
+def children(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as fh:
+        return [int(child) for child in fh.read().split()]
+
+
+def run(env, workers, preload, requests):
+    port = free_port()
+    command = [sys.executable, 'manage.py', 'serve', f'127.0.0.1:{port}', '--workers', str(workers)]
+    if not preload:
+        command.append('--no-preload')
+
+    started = time.perf_counter()
+    server = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        url = f'http://127.0.0.1:{port}/'
+        while True:
+            try:
+                urllib.request.urlopen(url, timeout=1).read()
+                break
+            except OSError:
+                if server.poll() is not None:
+                    raise RuntimeError('server exited during startup')
+                time.sleep(0.01)
+        ready = time.perf_counter() - started
+
+        # Exercise every worker a little so lazily-built state is counted.
+        for path in ['/', '/authors/', '/all-books/', '/search/?q=the', '/api/books/'] * requests:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}{path}', timeout=5).read()
+
+        master = memory_kib(server.pid)
+        per_worker = [memory_kib(pid) for pid in children(server.pid)]
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    label = 'preload' if preload else 'no preload'
+    print(f"{label:<11} first response after {ready * 1000:7.0f} ms; master RSS {master['Rss'] / 1024:6.1f} MiB")
+    for i, mem in enumerate(per_worker):
+        shared = (mem['Shared_Clean'] + mem['Shared_Dirty']) / 1024
+        private = (mem['Private_Clean'] + mem['Private_Dirty']) / 1024
+        print(
+            f"  worker {i}: RSS {mem['Rss'] / 1024:6.1f} MiB  PSS {mem['Pss'] / 1024:6.1f} MiB  "
+            f"shared {shared:6.1f} MiB  private {private:6.1f} MiB"
+        )
+    total_pss = sum(mem['Pss'] for mem in per_worker) + master['Pss']
+    print(f"  total PSS (master + workers): {total_pss / 1024:.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=5)
+    parser.add_argument('--books', type=int, default=2000)
+    args = parser.parse_args()
+
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        sys.exit('bench_serving reads /proc/<pid>/smaps_rollup and needs Linux.')
+
+    workdir = tempfile.mkdtemp(prefix='book-bench-')
+    env = {
+        **os.environ,
+        'DJANGO_SETTINGS_MODULE': 'book_collection.production',
+        'DJANGO_SECRET_KEY': 'benchmark-only',
+        'DJANGO_DB_PATH': os.path.join(workdir, 'bench.sqlite3'),
+        'DJANGO_SECURE_COOKIES': '0',
+        'DJANGO_CACHE_DIR': os.path.join(workdir, 'cache'),
+        'PYTHONPATH': str(ROOT),
+    }
+    seed = (
+        'from benchmarks.common import seed_catalog; import django; django.setup(); '
+        'from django.core.management import call_command; '
+        f'call_command("migrate", verbosity=0); seed_catalog({args.books})'
+    )
+    subprocess.run([sys.executable, '-c', seed], cwd=ROOT, env=env, check=True)
+
+    for preload in (False, True):
+        run(env, args.workers, preload, args.requests)
+
+
+if __name__ == '__main__':
+    main()
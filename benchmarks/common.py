@@ -0,0 +1,89 @@
+"""Shared setup for benchmarks that need Django and a throwaway database."""
+
+import os
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+
+WORDS = (
+    "the a of and night shadow river house garden war peace king queen stone "
+    "silent last first lost secret city empire sea winter summer road fire "
+    "glass iron golden little great dark light dream memory song storm wolf"
+).split()
+
+
+def setup_django(db_path=None, **overrides):
+    """Configure Django against a fresh SQLite file and migrate it."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'book_collection.settings')
+    workdir = tempfile.mkdtemp(prefix='book-bench-')
+
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = db_path or os.path.join(workdir, 'bench.sqlite3')
+    settings.CATALOG_SNAPSHOT_PATH = os.path.join(workdir, 'catalog.snapshot')
+    settings.STATIC_ROOT = os.path.join(workdir, 'static')
+    settings.ALLOWED_HOSTS = ['*']
+    settings.DEBUG = False
+    # Benchmarks replay far more requests per minute than any real client.
+    settings.THROTTLE_RATES = {}
+    settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_CLASSES': []}
+    settings.PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command('migrate', verbosity=0)
+    return workdir
+
+
+def seed_catalog(books, authors=None, seed=0, batch_size=5000):
+    """Bulk-insert synthetic books with one or two authors each."""
+    from books.models import Author, Book
+
+    rng = random.Random(seed)
+    authors = authors or max(1, books // 5)
+    Author.objects.bulk_create(
+        (Author(name=f"Author {i:07d} {rng.choice(WORDS).title()}") for i in range(authors)),
+        batch_size=batch_size,
+    )
+    author_ids = list(Author.objects.values_list('id', flat=True))
+
+    Book.objects.bulk_create(
+        (
+            Book(
+                title=" ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))).title(),
+                publication_year=str(rng.randint(1800, 2024)),
+                cover_image=f"https://covers.example.org/b/id/{i}-M.jpg",
+            )
+            for i in range(books)
+        ),
+        batch_size=batch_size,
+    )
+    through = Book.authors.through
+    links = []
+    for book_id in Book.objects.values_list('id', flat=True).iterator():
+        for author_id in rng.sample(author_ids, k=min(len(author_ids), rng.randint(1, 2))):
+            links.append(through(book_id=book_id, author_id=author_id))
+        if len(links) >= batch_size:
+            through.objects.bulk_create(links)
+            links = []
+    through.objects.bulk_create(links)
+
+
+@contextmanager
+def timed(label, results=None):
+    started = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - started
+    if results is not None:
+        results[label] = elapsed
+    print(f"{label:<32} {elapsed * 1000:10.2f} ms")
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
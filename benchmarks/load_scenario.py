@@ -0,0 +1,271 @@
+"""
+Offline load test: concurrent readers and admins against `manage.py serve`.
+
+Starts the mock Open Library server, seeds a throwaway database, launches
+the production settings under the preforking server and runs virtual users
+for a fixed time. Readers browse, search, favorite and comment; the staff
+user also adds books through the admin's Open Library import and uploads
+CSV bulk imports. Prints throughput and latency per action.
+
+    python -m benchmarks.load_scenario --users 20 --duration 30 --workers 4 --latency 150
+"""
+
+import argparse
+import io
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import requests
+
+from benchmarks.common import WORDS, percentile
+from benchmarks.mock_openlibrary import start_server
+
+ROOT = Path(__file__).resolve().parent.parent
+PASSWORD = 'load-test-password-1'
+
+SETTINGS_MODULE = '''
+from book_collection.production import *  # noqa: F401,F403
+from book_collection.production import REST_FRAMEWORK
+
+# Every virtual user shares 127.0.0.1, so per-IP limits would throttle the run.
+THROTTLE_RATES = {}
+REST_FRAMEWORK = {**REST_FRAMEWORK, 'DEFAULT_THROTTLE_CLASSES': []}
+CATALOG_SNAPSHOT_PATH = %(snapshot)r
+'''
+
+SEED = '''
+import django; django.setup()
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from benchmarks.common import seed_catalog
+from books.stats import rollup
+call_command('migrate', verbosity=0)
+seed_catalog(%(books)d)
+for i in range(%(users)d):
+    User.objects.create_user(f'reader{i}', password=%(password)r)
+User.objects.create_user('librarian', password=%(password)r, is_staff=True, is_superuser=True)
+rollup()
+'''
+
+# Relative weights of what a reader does next.
+READER_MIX = [
+    ('browse', 45),
+    ('book', 20),
+    ('search', 20),
+    ('favorite', 8),
+    ('comment', 7),
+]
+ADMIN_MIX = [
+    ('browse', 30),
+    ('admin_dashboard', 20),
+    ('admin_api_import', 35),
+    ('admin_bulk_import', 15),
+]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class Results:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def add(self, action, elapsed, ok):
+        with self.lock:
+            self.samples[action].append(elapsed * 1000)
+            if not ok:
+                self.errors[action] += 1
+
+
+class VirtualUser(threading.Thread):
+    def __init__(self, base_url, username, mix, books, results, deadline, seed):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.username = username
+        self.actions, self.weights = zip(*mix)
+        self.books = books
+        self.results = results
+        self.deadline = deadline
+        self.random = random.Random(seed)
+        self.session = requests.Session()
+
+    def csrf(self):
+        return self.session.cookies.get('csrftoken', '')
+
+    def request(self, action, method, path, expect=(200,), **kwargs):
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, allow_redirects=False, timeout=60, **kwargs)
+            ok = response.status_code in expect
+        except requests.RequestException:
+            ok = False
+        self.results.add(action, time.perf_counter() - started, ok)
+
+    def login(self):
+        self.session.get(f'{self.base_url}/login/', timeout=60)
+        self.request('login', 'POST', '/login/', expect=(302,), data={
+            'username': self.username,
+            'password': PASSWORD,
+            'csrfmiddlewaretoken': self.csrf(),
+        })
+
+    def run(self):
+        self.login()
+        while time.monotonic() < self.deadline:
+            action = self.random.choices(self.actions, self.weights)[0]
+            getattr(self, f'do_{action}')()
+
+    def book_id(self):
+        return self.random.randint(1, self.books)
+
+    def do_browse(self):
+        path = self.random.choice([
+            '/', f'/?page={self.random.randint(1, 20)}', '/all-books/',
+            f'/all-books/?page={self.random.randint(1, 20)}', '/authors/', '/dashboard/',
+        ])
+        self.request('browse', 'GET', path, expect=(200, 302))
+
+    def do_book(self):
+        self.request('book', 'GET', f'/book/{self.book_id()}/', expect=(200, 404))
+
+    def do_search(self):
+        words = ' '.join(self.random.sample(WORDS, self.random.randint(1, 2)))
+        self.request('search', 'GET', '/search/', params={'q': words})
+
+    def do_favorite(self):
+        self.request('favorite', 'GET', f'/book/{self.book_id()}/favorite/', expect=(302,))
+
+    def do_comment(self):
+        book_id = self.book_id()
+        if 'csrftoken' not in self.session.cookies:
+            self.session.get(f'{self.base_url}/book/{book_id}/', timeout=60)
+        self.request('comment', 'POST', f'/book/{book_id}/', expect=(302,), data={
+            'content': f'Load test comment {self.random.random():.6f}',
+            'csrfmiddlewaretoken': self.csrf(),
+        })
+
+    def do_admin_dashboard(self):
+        self.request('admin_dashboard', 'GET', '/admin-dashboard/')
+
+    def do_admin_api_import(self):
+        title = ' '.join(self.random.choice(WORDS) for _ in range(3))
+        self.request('admin_api_import', 'POST', '/admin/books/book/add-from-api/', expect=(200, 302), data={
+            'book_title': title,
+            'csrfmiddlewaretoken': self.csrf(),
+        })
+
+    def do_admin_bulk_import(self):
+        rows = ['title,authors,publication_year']
+        for _ in range(50):
+            title = ' '.join(self.random.choice(WORDS) for _ in range(3)).title()
+            rows.append(f'{title},Bulk Author {self.random.randint(1, 200)},{self.random.randint(1900, 2024)}')
+        upload = io.BytesIO('\n'.join(rows).encode())
+        self.request(
+            'admin_bulk_import', 'POST', '/admin/books/book/import/', expect=(302,),
+            data={'csrfmiddlewaretoken': self.csrf()},
+            files={'import_file': ('load.csv', upload, 'text/csv')},
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=20, help='Concurrent readers')
+    parser.add_argument('--admins', type=int, default=1, help='Concurrent staff sessions')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds of load')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--books', type=int, default=5000)
+    parser.add_argument('--latency', type=float, default=150, help='Mock Open Library delay, in ms')
+    parser.add_argument('--jitter', type=float, default=50)
+    parser.add_argument('--error-rate', type=float, default=0.02)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    mock = start_server(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed)
+
+    workdir = tempfile.mkdtemp(prefix='book-load-')
+    Path(workdir, 'loadtest_settings.py').write_text(
+        SETTINGS_MODULE % {'snapshot': os.path.join(workdir, 'catalog.snapshot')}
+    )
+    env = {
+        **os.environ,
+        'DJANGO_SETTINGS_MODULE': 'loadtest_settings',
+        'DJANGO_SECRET_KEY': 'load-test-only',
+        'DJANGO_DB_PATH': os.path.join(workdir, 'load.sqlite3'),
+        'DJANGO_SECURE_COOKIES': '0',
+        'DJANGO_CACHE_DIR': os.path.join(workdir, 'cache'),
+        'BOOKS_FAST_PASSWORD_HASHER': '1',
+        'OPEN_LIBRARY_BASE_URL': mock.url,
+        'OPEN_LIBRARY_COVERS_URL': f'{mock.url}/b',
+        'PYTHONPATH': os.pathsep.join([workdir, str(ROOT)]),
+    }
+    seed = SEED % {'books': args.books, 'users': args.users, 'password': PASSWORD}
+    subprocess.run([sys.executable, '-c', seed], cwd=ROOT, env=env, check=True)
+
+    port = free_port()
+    log_path = os.path.join(workdir, 'server.log')
+    log = open(log_path, 'wb')
+    server = subprocess.Popen(
+        [sys.executable, 'manage.py', 'serve', f'127.0.0.1:{port}', '--workers', str(args.workers)],
+        cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        while True:
+            try:
+                requests.get(base_url + '/', timeout=1)
+                break
+            except requests.RequestException:
+                if server.poll() is not None:
+                    raise RuntimeError('server exited during startup')
+                time.sleep(0.05)
+
+        results = Results()
+        deadline = time.monotonic() + args.duration
+        users = [
+            VirtualUser(base_url, f'reader{i}', READER_MIX, args.books, results, deadline, args.seed + i)
+            for i in range(args.users)
+        ] + [
+            VirtualUser(base_url, 'librarian', ADMIN_MIX, args.books, results, deadline, args.seed - i - 1)
+            for i in range(args.admins)
+        ]
+        started = time.monotonic()
+        for user in users:
+            user.start()
+        for user in users:
+            user.join()
+        elapsed = time.monotonic() - started
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        log.close()
+        mock.shutdown()
+
+    total = sum(len(samples) for samples in results.samples.values())
+    print(f'{args.users} readers + {args.admins} admins, {args.workers} workers, {elapsed:.1f} s: '
+          f'{total:,} requests, {total / elapsed:.1f} req/s')
+    print(f"{'action':<18} {'count':>7} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for action, samples in sorted(results.samples.items()):
+        print(
+            f'{action:<18} {len(samples):>7} {results.errors[action]:>7} {statistics.median(samples):>8.1f} '
+            f'{percentile(samples, 95):>8.1f} {percentile(samples, 99):>8.1f}'
+        )
+    print(f'mock Open Library: {dict(mock.stats)}')
+    print(f'server log: {log_path}')
+
+
+if __name__ == '__main__':
+    main()
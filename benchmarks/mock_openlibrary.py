@@ -0,0 +1,187 @@
+"""
+Local stand-in for openlibrary.org and covers.openlibrary.org.
+
+Serves the sample search, work and author responses in
+benchmarks/fixtures/openlibrary.json, plus a placeholder cover image, with
+configurable latency and failure rates. Titles that are not in the fixtures
+get a deterministic synthetic result, so imports under load keep creating
+new books.
+
+    python -m benchmarks.mock_openlibrary --port 8765 --latency 150 --error-rate 0.02
+    OPEN_LIBRARY_BASE_URL=http://127.0.0.1:8765 \
+    OPEN_LIBRARY_COVERS_URL=http://127.0.0.1:8765/b python manage.py runserver
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+ROOT = Path(__file__).resolve().parent.parent
+FIXTURES = Path(__file__).resolve().parent / 'fixtures' / 'openlibrary.json'
+COVER = ROOT / 'static' / 'images' / 'no-cover.jpg'
+
+COVER_RE = re.compile(r'^/b/id/(\d+)-[SML]\.jpg$')
+RECORD_RE = re.compile(r'^/(works|authors)/(OL\w+)\.json$')
+
+
+def synthetic_doc(title):
+    """A stable, made-up search result for a title the fixtures don't have."""
+    n = zlib.crc32(title.lower().encode())
+    return {
+        'key': f'/works/OLMOCK{n}W',
+        'title': title.strip().title(),
+        'author_name': [f'Mock Author {n % 997}'],
+        'first_publish_year': 1850 + n % 175,
+        'isbn': [f'979{n:010d}'[:13]],
+        'cover_i': n % 10_000_000,
+        'subject': ['Load testing'],
+    }
+
+
+class MockOpenLibrary(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, jitter=0.0, error_rate=0.0, timeout_rate=0.0,
+                 hang=15.0, synthesize=True, seed=None):
+        super().__init__(address, MockHandler)
+        data = json.loads(FIXTURES.read_text())
+        self.docs = data['search']
+        self.works = data['works']
+        self.authors = data['authors']
+        self.cover = COVER.read_bytes() if COVER.exists() else b''
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.hang = hang
+        self.synthesize = synthesize
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = Counter()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def draw(self):
+        with self.lock:
+            return self.random.random(), self.random.uniform(-self.jitter, self.jitter)
+
+    def search(self, title, limit):
+        needle = title.lower().strip()
+        docs = [doc for doc in self.docs if needle and needle in doc['title'].lower()]
+        if not docs and needle and self.synthesize:
+            docs = [synthetic_doc(title)]
+        return {'numFound': len(docs), 'start': 0, 'docs': docs[:limit]}
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    server: MockOpenLibrary
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status, body, content_type='application/json'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if status == 503:
+            self.send_header('Retry-After', '1')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status, data):
+        self.send_body(status, json.dumps(data).encode())
+
+    def do_GET(self):
+        server = self.server
+        roll, jitter = server.draw()
+        time.sleep(max(server.latency + jitter, 0) / 1000)
+
+        if roll < server.timeout_rate:
+            server.stats['timeout'] += 1
+            time.sleep(server.hang)
+            return
+        if roll < server.timeout_rate + server.error_rate:
+            server.stats['error'] += 1
+            self.send_json(503, {'error': 'Service temporarily unavailable (mock)'})
+            return
+
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+        if url.path == '/search.json':
+            server.stats['search'] += 1
+            title = (params.get('title') or params.get('q') or [''])[0]
+            limit = int((params.get('limit') or ['100'])[0])
+            self.send_json(200, server.search(title, limit))
+            return
+
+        match = RECORD_RE.match(url.path)
+        if match:
+            kind, key = match.group(1), url.path[:-len('.json')]
+            server.stats[kind] += 1
+            record = (server.works if kind == 'works' else server.authors).get(key)
+            if record is None and server.synthesize:
+                record = {'key': key, 'title' if kind == 'works' else 'name': f'Mock {key.rsplit("/", 1)[1]}'}
+            if record is None:
+                self.send_json(404, {'error': 'notfound', 'key': key})
+            else:
+                self.send_json(200, record)
+            return
+
+        if COVER_RE.match(url.path):
+            server.stats['covers'] += 1
+            self.send_body(200, server.cover, 'image/jpeg')
+            return
+
+        server.stats['not_found'] += 1
+        self.send_json(404, {'error': 'notfound'})
+
+
+def start_server(host='127.0.0.1', port=0, **options):
+    """Run a MockOpenLibrary on a background thread and return it; call shutdown() to stop."""
+    server = MockOpenLibrary((host, port), **options)
+    threading.Thread(target=server.serve_forever, name='mock-openlibrary', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0, help='Added delay per request, in ms')
+    parser.add_argument('--jitter', type=float, default=0, help='Uniform +/- variation of the delay, in ms')
+    parser.add_argument('--error-rate', type=float, default=0, help='Fraction of requests answered with 503')
+    parser.add_argument('--timeout-rate', type=float, default=0, help='Fraction of requests that hang')
+    parser.add_argument('--hang', type=float, default=15, help='How long a hanging request stalls, in seconds')
+    parser.add_argument('--no-synthesize', action='store_false', dest='synthesize',
+                        help='Return empty results for titles missing from the fixtures')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    server = MockOpenLibrary(
+        (args.host, args.port),
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate, hang=args.hang, synthesize=args.synthesize, seed=args.seed,
+    )
+    print(f'Mock Open Library on {server.url} (covers at {server.url}/b)')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(dict(server.stats))
+
+
+if __name__ == '__main__':
+    main()
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'book_collection.settings')
 
 application = get_asgi_application()
+
+if os.environ.get('BOOKS_PRELOAD') == '1':
+    from .serving import warm_up
+
+    warm_up()
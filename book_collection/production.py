@@ -0,0 +1,127 @@
+"""
+Production settings for book_collection, configured from the environment.
+
+Serve them with gunicorn, preloading the app in the master so the warmed
+caches are shared by the forked workers:
+
+    DJANGO_SETTINGS_MODULE=book_collection.production BOOKS_PRELOAD=1 \
+    DJANGO_SECRET_KEY=... DJANGO_ALLOWED_HOSTS=books.example.org \
+    DJANGO_REDIS_URL=redis://127.0.0.1:6379/0 DJANGO_WORKERS=4 \
+    gunicorn book_collection.wsgi --preload --workers 4 --bind 0.0.0.0:8000
+
+`manage.py serve` runs the same preloaded app on Django's development
+server (wsgiref), which is not meant for production; use it for local
+load tests and benchmarks only.
+
+Forked workers must share a cache; set DJANGO_REDIS_URL. DJANGO_CACHE_DIR
+selects a file-based cache instead, which is only good enough for load tests:
+its increments are not atomic, so catalog changes can fail to invalidate the
+other workers' snapshot, autocomplete index, page and search caches. With
+neither, DJANGO_WORKERS must be 1.
+"""
+
+import copy
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, REST_FRAMEWORK, TEMPLATES
+
+
+def env_list(name, default=''):
+    return [item.strip() for item in os.environ.get(name, default).split(',') if item.strip()]
+
+
+def env_bool(name, default=False):
+    return os.environ.get(name, str(default)).lower() in ('1', 'true', 'yes', 'on')
+
+
+DEBUG = env_bool('DJANGO_DEBUG')
+
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY')
+if not SECRET_KEY:
+    raise ImproperlyConfigured('Set DJANGO_SECRET_KEY for the production settings.')
+
+ALLOWED_HOSTS = env_list('DJANGO_ALLOWED_HOSTS', 'localhost,127.0.0.1')
+CSRF_TRUSTED_ORIGINS = env_list('DJANGO_CSRF_TRUSTED_ORIGINS')
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('DJANGO_DB_PATH', str(BASE_DIR / 'db.sqlite3')),
+        'CONN_MAX_AGE': int(os.environ.get('DJANGO_CONN_MAX_AGE', 60)),
+        'OPTIONS': {
+            # Several worker processes share one SQLite file. IMMEDIATE takes
+            # the write lock at BEGIN, so a transaction that reads then writes
+            # waits for it instead of failing with "database is locked".
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+        },
+    }
+}
+
+# Workers spawned by `manage.py serve` (set it to gunicorn's --workers too)
+SERVE_WORKERS = int(os.environ.get('DJANGO_WORKERS', os.cpu_count() or 1))
+
+# Workers need a cache they all see for page-cache locks, the catalog
+# version, throttles, cached sessions and users.
+if os.environ.get('DJANGO_REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['DJANGO_REDIS_URL'],
+        },
+        'throttle': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['DJANGO_REDIS_URL'],
+            'KEY_PREFIX': 'throttle',
+        },
+    }
+elif os.environ.get('DJANGO_CACHE_DIR'):
+    # For load tests and benchmarks only. add() and incr() are not atomic
+    # across processes. Throttles may let extra requests through, and two
+    # concurrent catalog version bumps can collapse into one. Then a worker
+    # adopts a version that doesn't cover the other worker's change, so its
+    # snapshot, autocomplete index, page and search caches can stay stale.
+    CACHES = {
+        alias: {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(os.environ['DJANGO_CACHE_DIR'], alias),
+            'OPTIONS': {'MAX_ENTRIES': max_entries},
+        }
+        for alias, max_entries in (('default', 10000), ('throttle', 50000))
+    }
+elif SERVE_WORKERS > 1:
+    raise ImproperlyConfigured(
+        f'DJANGO_WORKERS is {SERVE_WORKERS} but each worker would have its own in-memory cache. '
+        'Set DJANGO_REDIS_URL, or DJANGO_WORKERS=1. (DJANGO_CACHE_DIR also works for load tests, '
+        'but catalog invalidation across workers is unreliable with the file-based cache.)'
+    )
+
+# Compile each template once per process instead of on every render.
+TEMPLATES = copy.deepcopy(TEMPLATES)
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
+    # Reverse proxies in front of the app that append to X-Forwarded-For
+    'NUM_PROXIES': int(os.environ.get('DJANGO_NUM_PROXIES', 0)),
+}
+BOOK_API_FAST_PATH = env_bool('BOOK_API_FAST_PATH', True)
+
+SESSION_COOKIE_SECURE = env_bool('DJANGO_SECURE_COOKIES', True)
+CSRF_COOKIE_SECURE = SESSION_COOKIE_SECURE
+if env_bool('DJANGO_BEHIND_TLS_PROXY'):
+    SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+
+CORS_ALLOW_ALL_ORIGINS = env_bool('DJANGO_CORS_ALLOW_ALL', False)
+CORS_ALLOWED_ORIGINS = env_list('DJANGO_CORS_ALLOWED_ORIGINS')
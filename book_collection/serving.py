@@ -0,0 +1,58 @@
+"""
+Helpers for loading the WSGI app once in a parent process before forking.
+
+Anything built here (URL resolver, compiled templates, the autocomplete
+index, the catalog snapshot mapping, the first rendered list pages) is
+inherited copy-on-write by every worker instead of being rebuilt in each one.
+"""
+
+import gc
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up():
+    from django.conf import settings
+    from django.db import connections
+    from django.template import TemplateDoesNotExist, loader
+    from django.urls import get_resolver
+
+    from books import autocomplete, catalog, page_cache, snapshot
+
+    get_resolver().url_patterns
+
+    for directory in settings.TEMPLATES[0]['DIRS']:
+        for path in sorted(directory.rglob('*.html')):
+            try:
+                loader.get_template(str(path.relative_to(directory)))
+            except TemplateDoesNotExist:
+                pass
+
+    try:
+        autocomplete.get_index()
+        if snapshot.is_enabled() and snapshot.get_snapshot().version != catalog.get_version():
+            # Rebuild before forking rather than in every worker's background thread.
+            snapshot.build_snapshot()
+            snapshot.get_snapshot()
+        # Workers inherit these entries when the cache is process-local.
+        page_cache.warm(getattr(settings, 'PAGE_CACHE_WARM_PAGES', 5))
+    except Exception:
+        # Missing tables on a fresh install shouldn't stop the server.
+        logger.exception('Could not preload catalog data')
+
+    # Never hand an open database connection across fork().
+    connections.close_all()
+
+
+def load_application(warm=True):
+    from django.core.wsgi import get_wsgi_application
+
+    application = get_wsgi_application()
+    if warm:
+        warm_up()
+    # Objects that exist now are shared with workers; keep the GC from
+    # touching (and so copying) their pages after fork.
+    gc.collect()
+    gc.freeze()
+    return application
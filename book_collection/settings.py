@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -18,6 +20,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
+# book_collection/production.py layers environment-driven overrides on top.
 
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = 'django-insecure-@kr-g+47gfu0dbtztze(ooqhl!wqd6_7%*vuy78sb760x&84^7'
@@ -45,10 +48,11 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'books.middleware.ThresholdGZipMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'books.middleware.CachedUserAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -103,6 +107,28 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Fast, insecure hashing for the test runner and benchmarks (BOOKS_FAST_PASSWORD_HASHER=1)
+# so suites that log users in aren't dominated by PBKDF2.
+if sys.argv[1:2] == ['test'] or os.environ.get('BOOKS_FAST_PASSWORD_HASHER') == '1':
+    PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+# Sessions
+# BOOKS_SESSION_PROFILE picks the backend: 'cached_db' (default) reads through
+# the cache and writes to the DB, 'signed_cookies' keeps sessions entirely
+# client-side, 'db' is Django's stock database backend.
+SESSION_PROFILES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_PROFILES[os.environ.get('BOOKS_SESSION_PROFILE', 'cached_db')]
+
+# How long CachedUserAuthenticationMiddleware reuses a User row between requests.
+# Saves evict it everywhere only with a shared cache, so keep this short.
+AUTH_USER_CACHE_TIMEOUT = 60
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -122,6 +148,25 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# `collectstatic` minifies CSS/JSON, content-hashes every asset and writes
+# .gz (and .br, if the brotli package is installed) variants next to them.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'books.assets.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Serve STATIC_ROOT from Django (with precompressed variants and far-future
+# Cache-Control) when DEBUG is off and no front-end server handles /static/.
+SERVE_STATIC_FILES = True
+
+# HTML and API responses smaller than this are sent uncompressed
+COMPRESS_MIN_SIZE = 1024
 
 # Media files (uploaded images)
 MEDIA_URL = '/media/'
@@ -148,12 +193,98 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    'DEFAULT_THROTTLE_CLASSES': [
+        'books.throttling.AnonRateThrottle',
+        'books.throttling.UserRateThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': '60/min',
+        'user': '120/min',
+    },
+    # Throttles key clients by REMOTE_ADDR; only trust that many X-Forwarded-For
+    # hops when reverse proxies append them (set in production.py).
+    'NUM_PROXIES': 0,
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
     ],
 }
 
+# Serve JSON requests to /api/books/ from values() rows and a direct encoder
+# (orjson when installed) instead of BookSerializer; same output schema.
+BOOK_API_FAST_PATH = False
+
+# Size of each user's precomputed "recommended for you" list
+RECOMMENDATIONS_PER_USER = 10
+
+# Open Library endpoints used by the admin "add from API" import; point these at
+# benchmarks/mock_openlibrary.py for offline load tests
+OPEN_LIBRARY_BASE_URL = os.environ.get('OPEN_LIBRARY_BASE_URL', 'https://openlibrary.org')
+OPEN_LIBRARY_COVERS_URL = os.environ.get('OPEN_LIBRARY_COVERS_URL', 'https://covers.openlibrary.org/b')
+OPEN_LIBRARY_TIMEOUT = 10
+
+# Search results are cached per normalized query and catalog version
+SEARCH_CACHE_TIMEOUT = 300
+SEARCH_MAX_RESULTS = 500
+
+# Change feed at /api/changes/: longest long-poll, and how long deletes stay in
+# the log after compaction (consumers must poll at least this often)
+CHANGE_FEED_MAX_WAIT = 30
+CHANGE_LOG_TOMBSTONE_DAYS = 30
+
+# Upper bound on the in-memory title/author prefix index used by /api/autocomplete/.
+# An entry takes about 330 bytes, so 64 MB holds roughly 200k titles and
+# authors; past that the oldest titles are left out (and a warning logged).
+# A 1M-title catalog needs about 350 MB; size it with
+# `python -m benchmarks.bench_autocomplete --titles N`.
+AUTOCOMPLETE_MEMORY_BUDGET = 64 * 1024 * 1024
+
+# Memory-mapped card data for the home and all-books pages, shared by all workers
+CATALOG_SNAPSHOT_ENABLED = True
+CATALOG_SNAPSHOT_PATH = BASE_DIR / 'var' / 'catalog.snapshot'
+# Seconds a worker's background rebuilder waits after a change, to batch bursts
+CATALOG_SNAPSHOT_REBUILD_DELAY = 0.5
+
+# Admin uploads wait here for their `import_catalog --job` process; a running
+# job that reports no progress for IMPORT_JOB_STALE_AFTER seconds is failed
+IMPORT_SPOOL_DIR = BASE_DIR / 'var' / 'imports'
+IMPORT_JOB_STALE_AFTER = 600
+
+# Where `archive_comments` writes its gzipped NDJSON files
+ARCHIVE_DIR = BASE_DIR / 'var' / 'archive'
+
+# Use a shared backend (memcached/redis) in production so the page cache locks
+# and catalog version are seen by every worker.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'book-collection',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # Per-process counters for rate limiting; kept out of 'default' so page
+    # cache culling never evicts them.
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'book-collection-throttle',
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    },
+}
+
+# Sliding-window limits for HTML views, applied per client IP and per user
+THROTTLE_CACHE = 'throttle'
+THROTTLE_RATES = {
+    'search': '30/min',
+    'login': '10/min',
+    'register': '5/hour',
+}
+
+# Rendered public pages (home, authors, all_books) for anonymous visitors
+PAGE_CACHE_TIMEOUT = 300
+PAGE_CACHE_STALE_TIMEOUT = 60 * 60
+PAGE_CACHE_LOCK_TIMEOUT = 30
+PAGE_CACHE_WAIT_TIMEOUT = 2.0
+PAGE_CACHE_WARM_PAGES = 5
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -13,4 +13,10 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'book_collection.settings')
 
-application = get_wsgi_application()
+if os.environ.get('BOOKS_PRELOAD') == '1':
+    # e.g. `gunicorn --preload`: warm caches in the master before it forks.
+    from .serving import load_application
+
+    application = load_application()
+else:
+    application = get_wsgi_application()
@@ -1,32 +1,167 @@
+import os
+
 from django.contrib import admin
+from django.contrib.admin.options import csrf_protect_m
+from django.contrib.auth.admin import UserAdmin
+from django.contrib.auth.models import User
 from django.shortcuts import render, redirect
-from django.urls import path
+from django.urls import path, reverse
 from django.contrib import messages
-from django.http import HttpResponseRedirect
+from django.http import Http404, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
+from django.utils.text import capfirst
+from .bulk import EstimatedCountPaginator, get_job, iter_csv, iter_json, start_import_job, sync_finished_jobs
 from .models import Book, Author, Comment, Favorite
+from .purge import count_dependents, stream_delete
 from .utils import search_and_create_book, OpenLibraryAPI
 
 
-class AuthorAdmin(admin.ModelAdmin):
+class BulkImportExportMixin:
+    """Chunked CSV/JSON import with a progress page, plus streaming export actions."""
+
+    import_kind = None
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ['export_as_csv', 'export_as_json']
+
+    def get_bulk_urls(self):
+        info = self.opts.app_label, self.opts.model_name
+        return [
+            path('import/', self.admin_site.admin_view(self.import_view), name='%s_%s_import' % info),
+            path(
+                'import/<int:job_id>/',
+                self.admin_site.admin_view(self.import_progress_view),
+                name='%s_%s_import_progress' % info,
+            ),
+        ]
+
+    def import_view(self, request):
+        if not self.has_add_permission(request):
+            raise Http404
+
+        if request.method == 'POST':
+            upload = request.FILES.get('import_file')
+            fmt = os.path.splitext(upload.name)[1].lstrip('.').lower() if upload else ''
+            if fmt in ('jsonl', 'ndjson'):
+                fmt = 'json'
+
+            if not upload:
+                messages.error(request, 'Please choose a file to import.')
+            elif fmt not in ('csv', 'json'):
+                messages.error(request, 'Only .csv, .json and .jsonl files can be imported.')
+            else:
+                job_id = start_import_job(upload, self.import_kind, fmt)
+                info = self.opts.app_label, self.opts.model_name
+                return HttpResponseRedirect(reverse('admin:%s_%s_import_progress' % info, args=[job_id]))
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.opts,
+            'title': f'Import {self.opts.verbose_name_plural}',
+            'import_kind': self.import_kind,
+        }
+        return render(request, 'admin/books/import.html', context)
+
+    def changelist_view(self, request, extra_context=None):
+        sync_finished_jobs()
+        return super().changelist_view(request, extra_context=extra_context)
+
+    def import_progress_view(self, request, job_id):
+        job = get_job(job_id)
+        if job is None:
+            raise Http404('Unknown import job')
+
+        if request.GET.get('format') == 'json':
+            return JsonResponse(job)
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.opts,
+            'title': f'Importing {job["name"]}',
+            'job': job,
+            'job_id': job_id,
+        }
+        return render(request, 'admin/books/import_progress.html', context)
+
+    @admin.action(description='Export selected as CSV')
+    def export_as_csv(self, request, queryset):
+        response = StreamingHttpResponse(iter_csv(queryset), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{self.opts.model_name}s.csv"'
+        return response
+
+    @admin.action(description='Export selected as JSON')
+    def export_as_json(self, request, queryset):
+        response = StreamingHttpResponse(iter_json(queryset), content_type='application/json')
+        response['Content-Disposition'] = f'attachment; filename="{self.opts.model_name}s.json"'
+        return response
+
+
+class AuthorAdmin(BulkImportExportMixin, admin.ModelAdmin):
     list_display = ('name', 'birth_date', 'created_at')
     list_filter = ('created_at',)
     search_fields = ('name',)
     readonly_fields = ('created_at',)
+    import_kind = 'authors'
 
-
-class BookAdmin(admin.ModelAdmin):
+    def get_urls(self):
+        return self.get_bulk_urls() + super().get_urls()
+
+
+class StreamingDeleteMixin:
+    """Drain comments, favorites and other dependents in chunks before deleting."""
+
+    @csrf_protect_m
+    def delete_view(self, request, object_id, extra_context=None):
+        # ModelAdmin wraps the POST in one transaction, which would turn each
+        # of stream_delete()'s chunks into a savepoint of it.
+        return self._delete_view(request, object_id, extra_context)
+
+    def get_deleted_objects(self, objs, request):
+        """
+        Per-model counts of the direct dependents, instead of collecting
+        (and listing) every related object for the confirmation page.
+        """
+        objs = list(objs)
+        counts = count_dependents(self.model, [obj.pk for obj in objs])
+        to_delete = ['%s: %s' % (capfirst(self.opts.verbose_name), obj) for obj in objs]
+        model_count = {self.opts.verbose_name_plural: len(objs)}
+        perms_needed = set()
+        for model, count in counts.items():
+            opts = model._meta
+            to_delete.append('%s: %s' % (capfirst(opts.verbose_name_plural), count))
+            model_count[opts.verbose_name_plural] = count
+            if self.admin_site.is_registered(model) and not (
+                self.admin_site.get_model_admin(model).has_delete_permission(request)
+            ):
+                perms_needed.add(opts.verbose_name)
+        return to_delete, model_count, perms_needed, []
+
+    def delete_model(self, request, obj):
+        stream_delete(obj)
+
+    def delete_queryset(self, request, queryset):
+        pks = list(queryset.values_list('pk', flat=True))
+        for start in range(0, len(pks), 100):
+            for obj in self.model._base_manager.filter(pk__in=pks[start:start + 100]):
+                stream_delete(obj)
+
+
+class BookAdmin(StreamingDeleteMixin, BulkImportExportMixin, admin.ModelAdmin):
     list_display = ('title', 'get_authors_display', 'publication_year', 'created_at')
     list_filter = ('publication_year', 'created_at', 'authors')
     search_fields = ('title', 'authors__name', 'isbn')
     filter_horizontal = ('authors',)
     readonly_fields = ('created_at', 'updated_at', 'open_library_key')
+    import_kind = 'books'
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('authors')
 
     def get_urls(self):
         urls = super().get_urls()
         custom_urls = [
             path('add-from-api/', self.add_from_api_view, name='books_book_add_from_api'),
         ]
-        return custom_urls + urls
+        return custom_urls + self.get_bulk_urls() + urls
 
     def add_from_api_view(self, request):
         if request.method == 'POST':
@@ -76,10 +211,16 @@ class FavoriteAdmin(admin.ModelAdmin):
     readonly_fields = ('created_at',)
 
 
+class StreamingDeleteUserAdmin(StreamingDeleteMixin, UserAdmin):
+    pass
+
+
 admin.site.register(Author, AuthorAdmin)
 admin.site.register(Book, BookAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Favorite, FavoriteAdmin)
+admin.site.unregister(User)
+admin.site.register(User, StreamingDeleteUserAdmin)
 
 admin.site.site_header = "Book Collection Admin"
 admin.site.site_title = "Book Collection"
@@ -0,0 +1,133 @@
+import gzip
+import json
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.http import FileResponse, Http404
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip variants are written without it
+    brotli = None
+
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.json', '.svg', '.txt', '.html')
+FAR_FUTURE = 'public, max-age=31536000, immutable'
+SHORT_LIVED = 'public, max-age=3600'
+
+_css_comments = re.compile(r'/\*.*?\*/', re.S)
+_css_whitespace = re.compile(r'\s+')
+_css_punctuation = re.compile(r'\s*([{}:;,>])\s*')
+
+
+def minify_css(source: str) -> str:
+    source = _css_comments.sub('', source)
+    source = _css_whitespace.sub(' ', source)
+    source = _css_punctuation.sub(r'\1', source)
+    return source.replace(';}', '}').strip()
+
+
+def minify_json(source: str) -> str:
+    return json.dumps(json.loads(source), separators=(',', ':'), ensure_ascii=False)
+
+
+MINIFIERS = {
+    '.css': minify_css,
+    '.json': minify_json,
+}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Content-hashed static files, minified and with ``.gz``/``.br`` siblings.
+
+    Before ``collectstatic`` has produced a manifest, ``{% static %}`` falls
+    back to the unhashed name instead of raising, so tests and fresh checkouts
+    still render.
+    """
+
+    manifest_strict = False
+
+    def hashed_name(self, name, content=None, filename=None):
+        try:
+            return super().hashed_name(name, content, filename)
+        except ValueError:
+            if content is None and not self.hashed_files:
+                return name
+            raise
+
+    def post_process(self, paths, dry_run=False, **options):
+        for original, processed, was_processed in super().post_process(paths, dry_run, **options):
+            if not dry_run and not isinstance(was_processed, Exception) and processed:
+                self._optimize(processed)
+            yield original, processed, was_processed
+
+    def _optimize(self, name):
+        extension = os.path.splitext(name)[1].lower()
+        if extension not in COMPRESSIBLE_EXTENSIONS:
+            return
+
+        with self.open(name) as fh:
+            data = fh.read()
+
+        minifier = MINIFIERS.get(extension)
+        if minifier:
+            try:
+                minified = minifier(data.decode()).encode()
+            except ValueError:
+                minified = data
+            if len(minified) < len(data):
+                data = minified
+                self.delete(name)
+                self._save(name, ContentFile(data))
+
+        self._write_variant(name + '.gz', data, gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            self._write_variant(name + '.br', data, brotli.compress(data))
+
+    def _write_variant(self, name, original, compressed):
+        if self.exists(name):
+            self.delete(name)
+        if len(compressed) < len(original):
+            self._save(name, ContentFile(compressed))
+
+
+def serve_static(request, path):
+    """
+    Serve collected static files with precompressed variants and cache headers.
+
+    Only mounted when ``SERVE_STATIC_FILES`` is on and DEBUG is off; a front-end
+    web server pointed at STATIC_ROOT should take over where one is available.
+    """
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Invalid static path')
+    if not os.path.isfile(full_path):
+        raise Http404(f'"{path}" does not exist')
+
+    accept = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    encoding = None
+    serve_path = full_path
+    for token, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if re.search(rf'\b{token}\b', accept) and os.path.isfile(full_path + suffix):
+            encoding, serve_path = token, full_path + suffix
+            break
+
+    content_type, _ = mimetypes.guess_type(full_path)
+    response = FileResponse(open(serve_path, 'rb'), content_type=content_type or 'application/octet-stream')
+    if encoding:
+        response['Content-Encoding'] = encoding
+    if encoding or os.path.isfile(full_path + '.gz'):
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+    hashed = getattr(staticfiles_storage, 'hashed_files', {})
+    response['Cache-Control'] = FAR_FUTURE if path in hashed.values() else SHORT_LIVED
+    return response
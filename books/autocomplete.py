@@ -0,0 +1,312 @@
+import logging
+import sys
+import threading
+from bisect import bisect_left, insort
+from math import isqrt
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from . import catalog
+
+
+logger = logging.getLogger(__name__)
+
+# Rough per-entry overhead of the key tuple, the list slots and the dict entry
+# on top of the two strings themselves; an entry comes to about 330 bytes.
+ENTRY_OVERHEAD = 200
+
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+
+# Writes collect in a side array until it holds about sqrt(n) keys (at least
+# this many), then it is merged into the main one.
+MIN_RECENT = 256
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+
+class PrefixIndex:
+    """
+    Sorted arrays of ``(folded_label, kind, pk)`` keys searched with bisect.
+
+    Writes go to a small sorted ``recent`` array that is merged into the main
+    one once it grows past about sqrt(n) keys, so a write costs O(sqrt n)
+    amortized rather than a copy of the whole index. Both arrays are swapped
+    in together as new lists, never changed in place, so searches scan them
+    without taking the lock.
+
+    ``_labels`` maps ``(kind, pk)`` to ``(folded, label)``. Removing or
+    renaming an entry only updates it; keys that no longer match are skipped
+    by searches and dropped at the next merge.
+    """
+
+    def __init__(self, memory_budget: int = DEFAULT_MEMORY_BUDGET, version: Optional[int] = None):
+        self.memory_budget = memory_budget
+        # Catalog version the contents reflect; see get_index().
+        self.version = version
+        self.memory_used = 0
+        self.truncated = False
+        self._arrays: Tuple[List[Tuple[str, str, int]], List[Tuple[str, str, int]]] = ([], [])
+        self._labels: Dict[Tuple[str, int], Tuple[str, str]] = {}
+        self._stale = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._labels)
+
+    @staticmethod
+    def _entry_size(folded: str, label: str) -> int:
+        size = sys.getsizeof(folded) + ENTRY_OVERHEAD
+        if label != folded:
+            size += sys.getsizeof(label)
+        return size
+
+    def load(self, entries) -> None:
+        """Replace the index with ``(kind, pk, label)`` entries in one pass."""
+        keys = []
+        labels = {}
+        used = 0
+        truncated = False
+        for kind, pk, label in entries:
+            if not label:
+                continue
+            folded = normalize(label)
+            size = self._entry_size(folded, label)
+            if used + size > self.memory_budget:
+                truncated = True
+                break
+            used += size
+            keys.append((folded, kind, pk))
+            labels[(kind, pk)] = (folded, label)
+        keys.sort()
+        with self._lock:
+            self._arrays = (keys, [])
+            self._labels = labels
+            self._stale = 0
+            self.memory_used = used
+            self.truncated = truncated
+
+    def add(self, kind: str, pk: int, label: str) -> bool:
+        with self._lock:
+            self._discard(kind, pk)
+            if not label:
+                return False
+            folded = normalize(label)
+            size = self._entry_size(folded, label)
+            if self.memory_used + size > self.memory_budget:
+                self.truncated = True
+                return False
+            self._labels[(kind, pk)] = (folded, label)
+            self.memory_used += size
+
+            key = (folded, kind, pk)
+            keys, recent = self._arrays
+            if _contains(keys, key) or _contains(recent, key):
+                # Removed earlier and not merged away yet; valid again.
+                self._stale -= 1
+                return True
+            recent = list(recent)
+            insort(recent, key)
+            if len(recent) > max(MIN_RECENT, isqrt(len(keys))):
+                self._arrays = (self._merge(keys, recent), [])
+            else:
+                self._arrays = (keys, recent)
+            return True
+
+    def remove(self, kind: str, pk: int) -> None:
+        with self._lock:
+            self._discard(kind, pk)
+
+    def _discard(self, kind: str, pk: int) -> None:
+        entry = self._labels.pop((kind, pk), None)
+        if entry is None:
+            return
+        self._stale += 1
+        self.memory_used -= self._entry_size(*entry)
+
+    def _merge(self, keys, recent) -> List[Tuple[str, str, int]]:
+        # Both are sorted runs, which list.sort() merges in linear time.
+        merged = keys + recent
+        merged.sort()
+        if self._stale:
+            labels = self._labels
+            merged = [key for key in merged if labels.get((key[1], key[2]), ('',))[0] == key[0]]
+            self._stale = 0
+        return merged
+
+    def search(self, prefix: str, limit: int = 10, kind: Optional[str] = None) -> List[Dict]:
+        prefix = normalize(prefix)
+        if not prefix or limit <= 0:
+            return []
+
+        # Snapshot the references; writers swap in new objects rather than mutate.
+        keys, recent = self._arrays
+        labels = self._labels
+        results = []
+        i = bisect_left(keys, (prefix,))
+        j = bisect_left(recent, (prefix,))
+        while len(results) < limit:
+            a = keys[i] if i < len(keys) and keys[i][0].startswith(prefix) else None
+            b = recent[j] if j < len(recent) and recent[j][0].startswith(prefix) else None
+            if a is None and b is None:
+                break
+            if b is None or (a is not None and a < b):
+                key, i = a, i + 1
+            else:
+                key, j = b, j + 1
+            folded, entry_kind, pk = key
+            if kind and entry_kind != kind:
+                continue
+            entry = labels.get((entry_kind, pk))
+            if entry is not None and entry[0] == folded:
+                results.append({'type': entry_kind, 'id': pk, 'label': entry[1]})
+        return results
+
+
+def _contains(keys, key) -> bool:
+    i = bisect_left(keys, key)
+    return i < len(keys) and keys[i] == key
+
+
+_index: Optional[PrefixIndex] = None
+# Guards swapping _index and applying local writes to it.
+_build_lock = threading.Lock()
+# Local writes made while a rebuild reads the tables, replayed onto its result.
+_replay: Optional[List[Tuple[str, int, Optional[str]]]] = None
+_rebuilder: Optional[threading.Thread] = None
+_rebuilder_lock = threading.Lock()
+
+
+def build_index(version: Optional[int] = None) -> PrefixIndex:
+    from .models import Author, Book
+
+    budget = getattr(settings, 'AUTOCOMPLETE_MEMORY_BUDGET', DEFAULT_MEMORY_BUDGET)
+    index = PrefixIndex(memory_budget=budget, version=version)
+
+    def entries():
+        # Authors first and newest books next, so a tight budget drops old titles.
+        for pk, name in Author.objects.values_list('id', 'name').iterator(chunk_size=5000):
+            yield 'author', pk, name
+        for pk, title in Book.objects.values_list('id', 'title').order_by('-created_at').iterator(chunk_size=5000):
+            yield 'book', pk, title
+
+    index.load(entries())
+    if index.truncated:
+        logger.warning(
+            'Autocomplete index truncated at %d entries; raise AUTOCOMPLETE_MEMORY_BUDGET to cover the catalog.',
+            len(index),
+        )
+    return index
+
+
+def get_index() -> PrefixIndex:
+    """
+    This process's index, rebuilt when the catalog version has moved on.
+
+    Other workers' writes only reach this process through the shared catalog
+    version, so an index tagged with an older one is rebuilt on a background
+    thread. Until it is swapped in, callers keep searching the stale index;
+    only the very first build (normally done in the preloading parent
+    process) happens on the caller's thread.
+    """
+    global _index
+    version = catalog.get_version()
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    if index is None:
+        with _build_lock:
+            if _index is None:
+                _index = build_index(version)
+            return _index
+    _start_rebuild()
+    return _index
+
+
+def _rebuild() -> None:
+    global _index, _replay
+    with _build_lock:
+        _replay = []
+    try:
+        version = catalog.get_version()
+        index = build_index(version)
+        with _build_lock:
+            for kind, pk, label in _replay:
+                if label is None:
+                    index.remove(kind, pk)
+                else:
+                    index.add(kind, pk, label)
+            # bump_version() may have moved the old index past our version.
+            if _index is None or (_index.version or 0) <= version:
+                _index = index
+    finally:
+        with _build_lock:
+            _replay = None
+
+
+def _rebuild_in_background() -> None:
+    try:
+        _rebuild()
+    except Exception:
+        logger.exception('Autocomplete index rebuild failed')
+    finally:
+        connections.close_all()
+
+
+def _start_rebuild() -> None:
+    global _rebuilder
+    with _rebuilder_lock:
+        # Threads don't survive fork(), so a worker starts its own.
+        if _rebuilder is None or not _rebuilder.is_alive():
+            _rebuilder = threading.Thread(target=_rebuild_in_background, name='autocomplete-index', daemon=True)
+            _rebuilder.start()
+
+
+def is_loaded() -> bool:
+    return _index is not None
+
+
+def reset_index() -> None:
+    global _index, _replay
+    with _build_lock:
+        _index = None
+        _replay = None
+
+
+def _apply(kind: str, pk: int, label: Optional[str]) -> None:
+    # A rebuild in progress may have read the tables before this commit, so
+    # it replays the change onto its result before swapping it in.
+    with _build_lock:
+        if _index is not None:
+            if label is None:
+                _index.remove(kind, pk)
+            else:
+                _index.add(kind, pk, label)
+        if _replay is not None:
+            _replay.append((kind, pk, label))
+
+
+def schedule_add(kind: str, pk: int, label: str) -> None:
+    """Index ``label`` in this process once the current transaction commits."""
+    transaction.on_commit(lambda: _apply(kind, pk, label))
+
+
+def schedule_remove(kind: str, pk: int) -> None:
+    transaction.on_commit(lambda: _apply(kind, pk, None))
+
+
+def bump_version() -> int:
+    """
+    Bump the catalog version after a change this process has already indexed.
+
+    If nobody else bumped it since the index was built, the index stays
+    current and adopts the new version instead of being rebuilt.
+    """
+    with _build_lock:
+        version = catalog.bump_version()
+        if _index is not None and _index.version == version - 1:
+            _index.version = version
+        return version
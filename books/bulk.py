@@ -0,0 +1,442 @@
+import csv
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from . import changelog
+from .models import Author, Book, ImportJob
+
+
+BOOK_FIELDS = ['title', 'authors', 'publication_year', 'isbn', 'cover_image', 'description', 'open_library_key']
+AUTHOR_FIELDS = ['name', 'birth_date', 'bio']
+AUTHOR_SEPARATOR = ';'
+
+DEFAULT_CHUNK_SIZE = 500
+READ_SIZE = 64 * 1024
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+# Parsing
+
+def iter_csv_records(text: io.TextIOBase) -> Iterator[Dict]:
+    yield from csv.DictReader(text)
+
+
+def iter_json_records(text: io.TextIOBase) -> Iterator[Dict]:
+    """
+    Yield objects from a JSON array or JSON Lines stream without loading it all.
+
+    Each top-level value must be an object, so a value cut off at a read
+    boundary never decodes and we simply read more.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+    in_array = None
+
+    while True:
+        while pos < len(buffer) and (buffer[pos].isspace() or (in_array and buffer[pos] == ',')):
+            pos += 1
+        if pos >= len(buffer):
+            if eof:
+                break
+            chunk = text.read(READ_SIZE)
+            buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+            continue
+
+        if in_array is None:
+            in_array = buffer[pos] == '['
+            if in_array:
+                pos += 1
+            continue
+        if in_array and buffer[pos] == ']':
+            break
+
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise ImportFormatError(f'Invalid JSON near: {buffer[pos:pos + 40]!r}')
+            chunk = text.read(READ_SIZE)
+            buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+            continue
+
+        if not isinstance(value, dict):
+            raise ImportFormatError('Every JSON record must be an object.')
+        yield value
+        pos = end
+
+
+def iter_records(fileobj, fmt: str) -> Iterator[Dict]:
+    if fmt not in ('csv', 'json'):
+        raise ImportFormatError(f'Unsupported format: {fmt}')
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    try:
+        yield from (iter_csv_records(text) if fmt == 'csv' else iter_json_records(text))
+    finally:
+        # Hand the binary file back open; the caller still reads its position.
+        text.detach()
+
+
+def _chunks(records: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _text(record: Dict, field: str) -> Optional[str]:
+    value = record.get(field)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _author_names(record: Dict) -> List[str]:
+    value = record.get('authors') or []
+    if isinstance(value, str):
+        value = value.split(AUTHOR_SEPARATOR)
+    return [name.strip() for name in value if name and name.strip()]
+
+
+# Importing
+
+def import_authors_chunk(chunk: List[Dict]) -> Dict[str, int]:
+    authors = {}
+    for record in chunk:
+        name = _text(record, 'name')
+        if name and name not in authors:
+            authors[name] = Author(name=name, birth_date=_text(record, 'birth_date'), bio=_text(record, 'bio'))
+
+    existing = set(Author.objects.filter(name__in=list(authors)).values_list('name', flat=True))
+    new = [author for name, author in authors.items() if name not in existing]
+    with transaction.atomic():
+        Author.objects.bulk_create(new, ignore_conflicts=True)
+        # ignore_conflicts leaves pks unset, so read the new rows back for the change log.
+        changelog.record_bulk(Author.objects.filter(name__in=[author.name for author in new]))
+    return {'created': len(new), 'skipped': len(chunk) - len(new)}
+
+
+def import_books_chunk(chunk: List[Dict]) -> Dict[str, int]:
+    names = {name for record in chunk for name in _author_names(record)}
+    keys = {_text(record, 'open_library_key') for record in chunk} - {None}
+    existing_keys = set(Book.objects.filter(open_library_key__in=keys).values_list('open_library_key', flat=True))
+
+    books = []
+    book_authors = []
+    for record in chunk:
+        title = _text(record, 'title')
+        key = _text(record, 'open_library_key')
+        if not title or (key and key in existing_keys):
+            continue
+        if key:
+            existing_keys.add(key)
+        books.append(Book(
+            title=title[:300],
+            publication_year=_text(record, 'publication_year'),
+            isbn=_text(record, 'isbn'),
+            cover_image=_text(record, 'cover_image'),
+            description=_text(record, 'description'),
+            open_library_key=key,
+        ))
+        book_authors.append(_author_names(record))
+
+    with transaction.atomic():
+        existing_names = set(Author.objects.filter(name__in=names).values_list('name', flat=True))
+        Author.objects.bulk_create(
+            [Author(name=name, bio='Imported author') for name in names - existing_names],
+            ignore_conflicts=True,
+        )
+        changelog.record_bulk(Author.objects.filter(name__in=names - existing_names))
+        author_ids = dict(Author.objects.filter(name__in=names).values_list('name', 'id'))
+        Book.objects.bulk_create(books)
+
+        through = Book.authors.through
+        links = {
+            book.pk: sorted({author_ids[name] for name in book_names if name in author_ids})
+            for book, book_names in zip(books, book_authors)
+        }
+        through.objects.bulk_create(
+            [through(book_id=book_id, author_id=author_id) for book_id, ids in links.items() for author_id in ids],
+            ignore_conflicts=True,
+        )
+        changelog.record_bulk(books, author_ids=links)
+    return {'created': len(books), 'skipped': len(chunk) - len(books)}
+
+
+IMPORTERS = {
+    'books': import_books_chunk,
+    'authors': import_authors_chunk,
+}
+
+
+def run_import(
+    fileobj,
+    kind: str,
+    fmt: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_progress: Optional[Callable[[Dict], None]] = None,
+) -> Dict[str, int]:
+    """Stream ``fileobj`` into the catalog in chunks, one transaction per chunk."""
+    from .signals import bulk_catalog_changed
+
+    import_chunk = IMPORTERS[kind]
+    stats = {'processed': 0, 'created': 0, 'skipped': 0, 'bytes_read': 0}
+    try:
+        for chunk in _chunks(iter_records(fileobj, fmt), chunk_size):
+            result = import_chunk(chunk)
+            stats['processed'] += len(chunk)
+            stats['created'] += result['created']
+            stats['skipped'] += result['skipped']
+            stats['bytes_read'] = fileobj.tell()
+            if on_progress:
+                on_progress(stats)
+    finally:
+        if stats['created']:
+            bulk_catalog_changed()
+    return stats
+
+
+# Background jobs
+
+def _spool_dir() -> Path:
+    directory = Path(getattr(settings, 'IMPORT_SPOOL_DIR', Path(settings.BASE_DIR) / 'var' / 'imports'))
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def _process_alive(pid: int) -> bool:
+    if os.name != 'posix':
+        # No cheap liveness probe; rely on the heartbeat alone.
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _fail_if_orphaned(job: ImportJob) -> None:
+    """Mark a queued/running job failed when its process died or stopped reporting."""
+    if job.status not in ('queued', 'running'):
+        return
+    stale_after = getattr(settings, 'IMPORT_JOB_STALE_AFTER', 600)
+    if job.pid and not _process_alive(job.pid):
+        error = 'The import process exited before finishing.'
+    elif timezone.now() - job.updated_at > timedelta(seconds=stale_after):
+        error = f'No progress for {stale_after} seconds.'
+    else:
+        return
+    if ImportJob.objects.filter(pk=job.pk, status=job.status).update(status='failed', error=error):
+        job.status, job.error = 'failed', error
+        Path(job.path).unlink(missing_ok=True)
+
+
+def _sync_catalog(job: ImportJob) -> None:
+    """
+    Invalidate this process's catalog caches for a finished job, once.
+
+    The import process bumps the catalog version in its own cache, which the
+    web processes don't see when the cache is process-local.
+    """
+    from .signals import invalidate_catalog
+
+    if job.status not in ('done', 'failed') or not job.created or job.catalog_synced:
+        return
+    if ImportJob.objects.filter(pk=job.pk, catalog_synced=False).update(catalog_synced=True):
+        job.catalog_synced = True
+        invalidate_catalog()
+
+
+def sync_finished_jobs() -> None:
+    """Apply _sync_catalog() to finished jobs nobody watched to the end."""
+    for job in ImportJob.objects.filter(status__in=('done', 'failed'), created__gt=0, catalog_synced=False):
+        _sync_catalog(job)
+
+
+def get_job(job_id: int) -> Optional[Dict]:
+    job = ImportJob.objects.filter(pk=job_id).first()
+    if job is None:
+        return None
+    _fail_if_orphaned(job)
+    _sync_catalog(job)
+    return {
+        'kind': job.kind,
+        'name': job.name,
+        'status': job.status,
+        'total_bytes': job.total_bytes,
+        'bytes_read': job.bytes_read,
+        'processed': job.processed,
+        'created': job.created,
+        'skipped': job.skipped,
+        'error': job.error or None,
+    }
+
+
+def _spawn(job: ImportJob) -> None:
+    """Run ``import_catalog --job`` detached from this worker's process group."""
+    process = subprocess.Popen(
+        [sys.executable, str(Path(settings.BASE_DIR) / 'manage.py'), 'import_catalog', '--job', str(job.pk)],
+        cwd=settings.BASE_DIR,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    # Reap it when it exits so it doesn't linger as a zombie.
+    threading.Thread(target=process.wait, name=f'book-import-{job.pk}', daemon=True).start()
+
+
+def start_import_job(uploaded_file, kind: str, fmt: str) -> int:
+    """Spool the upload to disk and import it in a separate process."""
+    fd, path = tempfile.mkstemp(dir=_spool_dir(), prefix='book-import-', suffix=f'.{fmt}')
+    with os.fdopen(fd, 'wb') as spool:
+        for chunk in uploaded_file.chunks():
+            spool.write(chunk)
+
+    job = ImportJob.objects.create(
+        kind=kind, format=fmt, name=uploaded_file.name[:255], path=path, total_bytes=os.path.getsize(path),
+    )
+    try:
+        _spawn(job)
+    except OSError as e:
+        ImportJob.objects.filter(pk=job.pk).update(status='failed', error=f'Could not start the import: {e}')
+        os.unlink(path)
+    return job.pk
+
+
+def run_job(job_id: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> ImportJob:
+    """Run a queued job in this process, recording progress on its row."""
+    job = ImportJob.objects.get(pk=job_id)
+    if not ImportJob.objects.filter(pk=job_id, status='queued').update(status='running', pid=os.getpid()):
+        raise ImportFormatError(f'Import job {job_id} is {job.status}, not queued.')
+
+    def progress(stats):
+        ImportJob.objects.filter(pk=job_id).update(updated_at=timezone.now(), **stats)
+
+    try:
+        with open(job.path, 'rb') as fileobj:
+            stats = run_import(fileobj, job.kind, job.format, chunk_size, on_progress=progress)
+        ImportJob.objects.filter(pk=job_id).update(status='done', updated_at=timezone.now(), **stats)
+    except Exception as e:
+        ImportJob.objects.filter(pk=job_id).update(status='failed', error=str(e), updated_at=timezone.now())
+        raise
+    finally:
+        Path(job.path).unlink(missing_ok=True)
+    return ImportJob.objects.get(pk=job_id)
+
+
+# Exporting
+
+def _book_row(book: Book) -> Dict:
+    return {
+        'title': book.title,
+        'authors': AUTHOR_SEPARATOR.join(author.name for author in book.authors.all()),
+        'publication_year': book.publication_year or '',
+        'isbn': book.isbn or '',
+        'cover_image': book.cover_image or '',
+        'description': book.description or '',
+        'open_library_key': book.open_library_key or '',
+    }
+
+
+def _author_row(author: Author) -> Dict:
+    return {
+        'name': author.name,
+        'birth_date': author.birth_date or '',
+        'bio': author.bio or '',
+    }
+
+
+def export_rows(queryset: QuerySet, chunk_size: int = 2000) -> Iterator[Dict]:
+    if queryset.model is Book:
+        for book in queryset.prefetch_related('authors').iterator(chunk_size=chunk_size):
+            yield _book_row(book)
+    else:
+        for author in queryset.iterator(chunk_size=chunk_size):
+            yield _author_row(author)
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def iter_csv(queryset: QuerySet) -> Iterator[str]:
+    fields = BOOK_FIELDS if queryset.model is Book else AUTHOR_FIELDS
+    writer = csv.DictWriter(_Echo(), fieldnames=fields)
+    yield writer.writeheader()
+    for row in export_rows(queryset):
+        yield writer.writerow(row)
+
+
+def iter_json(queryset: QuerySet) -> Iterator[str]:
+    yield '['
+    separator = '\n'
+    for row in export_rows(queryset):
+        yield separator + json.dumps(row, ensure_ascii=False)
+        separator = ',\n'
+    yield '\n]\n'
+
+
+# Admin pagination
+
+def estimate_row_count(model) -> Optional[int]:
+    """Planner/rowid-based row estimate for a whole table, or None if unsupported."""
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [table])
+        elif connection.vendor == 'sqlite':
+            # MAX(rowid) is a single b-tree seek; gaps from deletes overcount a little.
+            cursor.execute(f'SELECT MAX(rowid) FROM {connection.ops.quote_name(table)}')
+        elif connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT table_rows FROM information_schema.tables '
+                'WHERE table_schema = DATABASE() AND table_name = %s',
+                [table],
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+    return int(row[0]) if row and row[0] is not None and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Use a cheap table estimate instead of COUNT(*) for large, unfiltered changelists."""
+
+    exact_threshold = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where:
+            estimate = estimate_row_count(queryset.model)
+            if estimate is not None and estimate > self.exact_threshold:
+                return estimate
+        return super().count
@@ -0,0 +1,21 @@
+from django.core.cache import cache
+
+
+VERSION_KEY = 'books:catalog-version'
+
+
+def get_version() -> int:
+    """Current catalog generation; any cached data tagged with an older one is stale."""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def bump_version() -> int:
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        return cache.incr(VERSION_KEY)
@@ -0,0 +1,189 @@
+import time
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Max, OuterRef, Subquery
+from django.utils import timezone
+
+from .models import Author, Book, ChangeLogCompaction, ChangeLogEntry, Comment, Favorite
+
+
+HEAD_KEY = 'books:changelog-head'
+# How stale another process's view of the newest entry may be while long-polling.
+HEAD_TTL = 1
+POLL_INTERVAL = 0.1
+
+TRACKED = {
+    Book: ('book', ['title', 'publication_year', 'isbn', 'cover_image', 'description', 'open_library_key']),
+    Author: ('author', ['name', 'birth_date', 'bio']),
+    Comment: ('comment', ['book_id', 'user_id', 'content']),
+    Favorite: ('favorite', ['user_id', 'book_id']),
+}
+MODEL_NAMES = [name for name, _ in TRACKED.values()]
+
+
+def serialize(instance, author_ids: Optional[Sequence[int]] = None) -> Dict:
+    fields = TRACKED[type(instance)][1]
+    data = {field.removesuffix('_id'): getattr(instance, field) for field in fields}
+    if isinstance(instance, Book):
+        if author_ids is None:
+            author_ids = instance.authors.values_list('id', flat=True)
+        data['authors'] = sorted(author_ids)
+    return data
+
+
+def _entry(instance, action: str, author_ids: Optional[Sequence[int]] = None) -> ChangeLogEntry:
+    return ChangeLogEntry(
+        model=TRACKED[type(instance)][0],
+        object_id=instance.pk,
+        action=action,
+        data=None if action == 'delete' else serialize(instance, author_ids),
+    )
+
+
+def _publish_head(entry_id: int, using: str) -> None:
+    # Wakes long-polls in this process at once; others notice within HEAD_TTL.
+    transaction.on_commit(lambda: cache.set(HEAD_KEY, entry_id, timeout=HEAD_TTL), using=using)
+
+
+def record(instance, action: str) -> None:
+    """Append one entry; called from signal handlers inside the change's transaction."""
+    using = instance._state.db or 'default'
+    entry = _entry(instance, action)
+    entry.save(using=using)
+    _publish_head(entry.pk, using)
+
+
+def record_bulk(instances: Iterable, action: str = 'create', author_ids: Optional[Dict[int, List[int]]] = None) -> int:
+    """Log rows written with bulk_create(), which sends no signals."""
+    author_ids = author_ids or {}
+    entries = [_entry(instance, action, author_ids.get(instance.pk)) for instance in instances]
+    if entries:
+        ChangeLogEntry.objects.bulk_create(entries)
+        if entries[-1].pk:
+            _publish_head(entries[-1].pk, 'default')
+    return len(entries)
+
+
+# Change feed
+
+def head() -> int:
+    latest = cache.get(HEAD_KEY)
+    if latest is None:
+        latest = ChangeLogEntry.objects.aggregate(latest=Max('id'))['latest'] or 0
+        cache.set(HEAD_KEY, latest, timeout=HEAD_TTL)
+    return latest
+
+
+def horizon() -> int:
+    """Cursors below this may have missed deletes dropped by compaction."""
+    return ChangeLogCompaction.objects.aggregate(through=Max('tombstones_through'))['through'] or 0
+
+
+def read(cursor: int, limit: int, models: Optional[Sequence[str]] = None) -> List[ChangeLogEntry]:
+    entries = ChangeLogEntry.objects.filter(id__gt=cursor)
+    if models:
+        entries = entries.filter(model__in=models)
+    return list(entries.order_by('id')[:limit + 1])
+
+
+def poll(
+    cursor: int,
+    limit: int,
+    models: Optional[Sequence[str]] = None,
+    wait: float = 0,
+) -> Tuple[List[ChangeLogEntry], int, bool]:
+    """
+    Return ``(entries, next_cursor, has_more)`` for changes after ``cursor``.
+
+    With ``wait`` the call blocks up to that many seconds until something
+    arrives. Waiting only re-reads the cached head id, so idle consumers
+    cost no queries beyond one ``MAX(id)`` per process per ``HEAD_TTL``.
+
+    Ids come from SQLite, which serializes writers, so they become visible
+    in order and a cursor never skips a late-committing entry.
+    """
+    deadline = time.monotonic() + wait
+    while True:
+        latest = head()
+        if latest > cursor:
+            entries = read(cursor, limit, models)
+            if entries:
+                has_more = len(entries) > limit
+                entries = entries[:limit]
+                return entries, entries[-1].id, has_more
+            # Everything up to ``latest`` was for other models.
+            cursor = latest
+        if time.monotonic() >= deadline:
+            return [], cursor, False
+        time.sleep(POLL_INTERVAL)
+
+
+def to_dict(entry: ChangeLogEntry) -> Dict:
+    return {
+        'id': entry.id,
+        'model': entry.model,
+        'object_id': entry.object_id,
+        'action': entry.action,
+        'data': entry.data,
+        'at': entry.created_at,
+    }
+
+
+# Compaction
+
+def _delete_in_chunks(queryset, chunk_size: int) -> Tuple[int, int]:
+    """
+    Delete matching rows a chunk at a time, each in its own short transaction.
+
+    Each pass resumes after the last id seen, so the log is scanned once.
+    Returns ``(rows removed, highest id removed)``.
+    """
+    removed = highest = 0
+    while True:
+        ids = list(queryset.filter(id__gt=highest).order_by('id').values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            return removed, highest
+        with transaction.atomic():
+            removed += ChangeLogEntry.objects.filter(id__in=ids).delete()[0]
+        highest = ids[-1]
+
+
+def compact(tombstone_days: Optional[int] = None, chunk_size: int = 1000) -> Dict[str, int]:
+    """
+    Keep only the newest entry per object, and drop deletes older than ``tombstone_days``.
+
+    A consumer behind the compacted range still ends up with each object's
+    latest state. Dropping old deletes is the only lossy step, so the highest
+    dropped id is recorded and older cursors are told to resync.
+    """
+    if tombstone_days is None:
+        tombstone_days = getattr(settings, 'CHANGE_LOG_TOMBSTONE_DAYS', 30)
+
+    newest = ChangeLogEntry.objects.filter(
+        model=OuterRef('model'), object_id=OuterRef('object_id'),
+    ).order_by('-id').values('id')[:1]
+    latest_per_object = ChangeLogEntry.objects.annotate(newest=Subquery(newest))
+
+    superseded, _ = _delete_in_chunks(latest_per_object.filter(id__lt=F('newest')), chunk_size)
+    tombstones, through = _delete_in_chunks(
+        latest_per_object.filter(
+            id=F('newest'),
+            action='delete',
+            created_at__lt=timezone.now() - timedelta(days=tombstone_days),
+        ),
+        chunk_size,
+    )
+
+    ChangeLogCompaction.objects.create(
+        tombstones_through=max(through, horizon()),
+        removed=superseded + tombstones,
+    )
+    return {
+        'superseded': superseded,
+        'tombstones': tombstones,
+        'remaining': ChangeLogEntry.objects.count(),
+    }
@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from books.purge import DEFAULT_CHUNK_SIZE, archive_comments
+
+
+class Command(BaseCommand):
+    help = 'Move comments older than N days to a gzipped NDJSON archive, a chunk at a time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=365, help='Age in days')
+        parser.add_argument('--output', help='Archive file (default: ARCHIVE_DIR/comments-<timestamp>.ndjson.gz)')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between chunks')
+        parser.add_argument('--keep', action='store_false', dest='delete', help='Archive without deleting')
+
+    def handle(self, *args, **options):
+        result = archive_comments(
+            timezone.now() - timedelta(days=options['older_than']),
+            path=options['output'],
+            chunk_size=options['chunk_size'],
+            delete=options['delete'],
+            pause=options['pause'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {result['archived']:,} comments to {result['path']} "
+            f"and deleted {result['deleted']:,}."
+        ))
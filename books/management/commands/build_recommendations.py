@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from books.recommendations import rebuild_all
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the favorite co-occurrence matrix and every user\'s recommendations'
+
+    def handle(self, *args, **options):
+        stats = rebuild_all()
+        self.stdout.write(self.style.SUCCESS(
+            f"Built {stats['cells']:,} co-occurrence cells over {stats['books']:,} books and "
+            f"{stats['recommendations']:,} recommendations for {stats['users']:,} users."
+        ))
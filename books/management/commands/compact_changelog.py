@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from books.changelog import compact
+
+
+class Command(BaseCommand):
+    help = 'Drop superseded change log entries and expired deletes to bound the log size'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tombstone-days',
+            type=int,
+            default=settings.CHANGE_LOG_TOMBSTONE_DAYS,
+            help='Keep delete entries at least this many days',
+        )
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        stats = compact(options['tombstone_days'], options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Removed {stats['superseded']:,} superseded entries and {stats['tombstones']:,} expired deletes; "
+            f"{stats['remaining']:,} entries remain."
+        ))
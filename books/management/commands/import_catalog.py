@@ -0,0 +1,63 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from books import snapshot
+from books.bulk import DEFAULT_CHUNK_SIZE, ImportFormatError, run_import, run_job
+
+
+class Command(BaseCommand):
+    help = 'Bulk-import books or authors from a CSV or JSON (array or JSON Lines) file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', help='File to import')
+        parser.add_argument('--job', type=int, help='Run an import queued from the admin instead of a file')
+        parser.add_argument('--kind', choices=['books', 'authors'], default='books')
+        parser.add_argument('--format', choices=['csv', 'json'], help='Defaults to the file extension')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            self.import_catalog(options)
+        finally:
+            snapshot.finish_rebuild()
+
+    def import_catalog(self, options):
+        if options['job']:
+            try:
+                job = run_job(options['job'], options['chunk_size'])
+            except ImportFormatError as e:
+                raise CommandError(str(e))
+            self.stdout.write(f'Import job {job.pk}: {job.created:,} created, {job.skipped:,} skipped.')
+            return
+
+        path = options['path']
+        if not path:
+            raise CommandError('Pass a file to import, or --job.')
+        fmt = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if fmt in ('jsonl', 'ndjson'):
+            fmt = 'json'
+        if fmt not in ('csv', 'json'):
+            raise CommandError('Could not infer the format; pass --format csv or --format json.')
+
+        total = os.path.getsize(path)
+
+        def progress(stats):
+            percent = stats['bytes_read'] * 100 // total if total else 100
+            self.stdout.write(
+                f"\r{percent:3d}%  {stats['processed']:,} rows, {stats['created']:,} created",
+                ending='',
+            )
+            self.stdout.flush()
+
+        try:
+            with open(path, 'rb') as fileobj:
+                stats = run_import(fileobj, options['kind'], fmt, options['chunk_size'], on_progress=progress)
+        except ImportFormatError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats['created']:,} {options['kind']} ({stats['skipped']:,} skipped) "
+            f"from {stats['processed']:,} rows."
+        ))
@@ -0,0 +1,29 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from books.models import Book
+from books.purge import DEFAULT_CHUNK_SIZE, stream_delete
+
+
+class Command(BaseCommand):
+    help = 'Delete books or users with their comments, favorites and other dependents, in small chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, nargs='+', default=[], metavar='ID')
+        parser.add_argument('--users', type=int, nargs='+', default=[], metavar='ID')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between chunks')
+
+    def handle(self, *args, **options):
+        if not options['books'] and not options['users']:
+            raise CommandError('Pass --books and/or --users.')
+
+        for model, ids in ((Book, options['books']), (User, options['users'])):
+            for pk in ids:
+                obj = model.objects.filter(pk=pk).first()
+                if obj is None:
+                    self.stderr.write(f'No {model._meta.verbose_name} {pk}')
+                    continue
+                counts = stream_delete(obj, options['chunk_size'], options['pause'])
+                summary = ', '.join(f'{count:,} {label}' for label, count in counts.items())
+                self.stdout.write(self.style.SUCCESS(f'Deleted {model._meta.verbose_name} {pk}: {summary}'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from books.stats import rollup
+
+
+class Command(BaseCommand):
+    help = 'Recompute the admin dashboard statistics from the source tables'
+
+    def handle(self, *args, **options):
+        count = rollup()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count:,} statistics.'))
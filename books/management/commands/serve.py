@@ -0,0 +1,132 @@
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+
+
+class PreforkedWSGIServer(ThreadedWSGIServer):
+    """ThreadedWSGIServer that serves an already-bound, shared listening socket."""
+
+    def __init__(self, listener, handler):
+        super().__init__(listener.getsockname()[:2], handler, bind_and_activate=False)
+        self.socket.close()
+        self.socket = listener
+        host, port = listener.getsockname()[:2]
+        self.server_name = socket.getfqdn(host)
+        self.server_port = port
+        self.setup_environ()
+
+
+class Command(BaseCommand):
+    help = (
+        'Serve the site from N forked worker processes that share a preloaded app. '
+        "Built on Django's development server: for load tests, not production."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('addrport', nargs='?', default='127.0.0.1:8000')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=getattr(settings, 'SERVE_WORKERS', os.cpu_count() or 1),
+        )
+        parser.add_argument(
+            '--no-preload',
+            action='store_false',
+            dest='preload',
+            help='Load the app separately in each worker after forking',
+        )
+
+    def handle(self, *args, **options):
+        if not hasattr(os, 'fork'):
+            raise CommandError('serve needs os.fork(); use runserver on this platform.')
+        local = [
+            alias for alias, config in settings.CACHES.items()
+            if config['BACKEND'].endswith('.LocMemCache')
+        ]
+        if options['workers'] > 1 and local:
+            raise CommandError(
+                f'Cache {", ".join(local)} is in-memory, so {options["workers"]} workers would not '
+                'share sessions, locks or throttles. Configure a shared cache or use --workers 1.'
+            )
+
+        host, _, port = options['addrport'].rpartition(':')
+        host = host or '127.0.0.1'
+        try:
+            listener = socket.create_server((host, int(port)), backlog=512)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Could not listen on {options["addrport"]}: {e}')
+
+        from book_collection.serving import load_application
+
+        started = time.perf_counter()
+        application = load_application() if options['preload'] else None
+        self.stdout.write(
+            f'Listening on http://{host}:{listener.getsockname()[1]}/ with {options["workers"]} workers '
+            f'({"preloaded in %.0f ms" % ((time.perf_counter() - started) * 1000) if application else "no preload"})'
+        )
+        self.stdout.flush()
+
+        self.workers = {}
+        self.stopping = False
+
+        def stop(signum, frame):
+            self.stopping = True
+            for pid in list(self.workers):
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        for _ in range(options['workers']):
+            self.spawn(listener, application)
+
+        while self.workers:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            self.workers.pop(pid, None)
+            if not self.stopping:
+                self.stderr.write(f'Worker {pid} exited with status {status}; restarting')
+                self.spawn(listener, application)
+
+        listener.close()
+
+    def spawn(self, listener, application):
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = time.time()
+            return
+
+        # Worker process
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        code = 0
+        try:
+            if application is None:
+                from book_collection.serving import load_application
+
+                application = load_application()
+            server = PreforkedWSGIServer(listener, WSGIRequestHandler)
+            server.daemon_threads = True
+            server.set_app(application)
+            server.serve_forever()
+        except SystemExit:
+            pass
+        except Exception:
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from books import page_cache
+
+
+class Command(BaseCommand):
+    help = 'Pre-render the first pages of the public list views into the page cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=getattr(settings, 'PAGE_CACHE_WARM_PAGES', 5),
+            help='Number of pages to render per view',
+        )
+
+    def handle(self, *args, **options):
+        if page_cache.is_process_local():
+            raise CommandError(
+                'The default cache is local to this process, so the server would never see the warmed pages. '
+                'A preloaded server (manage.py serve, or BOOKS_PRELOAD=1) warms them at startup instead.'
+            )
+        warmed, skipped = page_cache.warm(options['pages'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Warmed {warmed} page(s); {skipped} already being rebuilt by another worker.'
+        ))
@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.cache import cache
+from django.middleware.gzip import GZipMiddleware
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+
+class ThresholdGZipMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware with a configurable minimum size, skipping streamed files.
+
+    Streaming responses here are static files or downloads: they are either
+    served from a precompressed variant already or not worth compressing.
+    """
+
+    def process_response(self, request, response):
+        if response.streaming:
+            return response
+        if len(response.content) < getattr(settings, 'COMPRESS_MIN_SIZE', 1024):
+            return response
+        return super().process_response(request, response)
+
+
+def user_cache_key(user_id) -> str:
+    return f'books:auth-user:{user_id}'
+
+
+def get_cached_user(request):
+    """
+    ``auth.get_user`` with the User row served from the cache between requests.
+
+    The cached instance is only trusted when the session's auth hash still
+    matches it and the backend would still let it authenticate, exactly as
+    ``auth.get_user`` checks a freshly loaded one; anything else falls through
+    to the stock lookup. Saving or deleting a User evicts its entry.
+    """
+    from django.contrib.auth.models import AnonymousUser
+
+    try:
+        user_id = auth._get_user_session_key(request)
+        backend_path = request.session[auth.BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+    session_hash = request.session.get(auth.HASH_SESSION_KEY)
+    if (
+        user is not None
+        and backend_path in settings.AUTHENTICATION_BACKENDS
+        and session_hash
+        and constant_time_compare(session_hash, user.get_session_auth_hash())
+        and _can_authenticate(backend_path, user)
+    ):
+        user.backend = backend_path
+        return user
+
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        cache.set(key, user, timeout=getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 60))
+    return user
+
+
+def _can_authenticate(backend_path, user) -> bool:
+    # ModelBackend rejects inactive users here; other backends may not define it.
+    check = getattr(auth.load_backend(backend_path), 'user_can_authenticate', None)
+    return check(user) if check else True
+
+
+class CachedUserAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware that resolves ``request.user`` via get_cached_user()."""
+
+    def process_request(self, request):
+        super().process_request(request)
+
+        def get_user():
+            if not hasattr(request, '_cached_user'):
+                request._cached_user = get_cached_user(request)
+            return request._cached_user
+
+        request.user = SimpleLazyObject(get_user)
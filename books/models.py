@@ -1,9 +1,19 @@
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, router, transaction
 from django.urls import reverse
 from django.contrib.auth.models import User
 
 
-class Author(models.Model):
+class AtomicSaveMixin:
+    """Run save() and its post_save handlers (the change log) in one transaction."""
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+
+
+class Author(AtomicSaveMixin, models.Model):
     name = models.CharField(max_length=200, unique=True)
     birth_date = models.CharField(max_length=50, blank=True, null=True)
     bio = models.TextField(blank=True, null=True)
@@ -19,7 +29,7 @@ class Author(models.Model):
         return reverse('books:author_books', kwargs={'author_id': self.pk})
 
 
-class Book(models.Model):
+class Book(AtomicSaveMixin, models.Model):
     title = models.CharField(max_length=300)
     authors = models.ManyToManyField(Author, related_name='books')
     cover_image = models.URLField(blank=True, null=True)
@@ -48,7 +58,7 @@ class Book(models.Model):
         return '/static/images/no-cover.jpg'
 
 
-class Comment(models.Model):
+class Comment(AtomicSaveMixin, models.Model):
     book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='comments')
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     content = models.TextField()
@@ -62,7 +72,7 @@ class Comment(models.Model):
         return f'Comment by {self.user.username} on {self.book.title}'
 
 
-class Favorite(models.Model):
+class Favorite(AtomicSaveMixin, models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='favorites')
     book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='favorited_by')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -73,3 +83,136 @@ class Favorite(models.Model):
 
     def __str__(self):
         return f'{self.user.username} favorites {self.book.title}'
+
+
+class BookCooccurrence(models.Model):
+    """
+    One cell of the sparse item-item matrix: how many users favorited both books.
+
+    The diagonal (book == other) holds each book's favorite count.
+    """
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='cooccurrences')
+    other = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='+')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('book', 'other')
+
+    def __str__(self):
+        return f'{self.book_id} x {self.other_id}: {self.count}'
+
+
+class Recommendation(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recommendations')
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='recommended_to')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        unique_together = ('user', 'book')
+        ordering = ['user', 'rank']
+
+    def __str__(self):
+        return f'{self.book.title} for {self.user.username}'
+
+
+class ChangeLogEntry(models.Model):
+    """
+    One create/update/delete of a Book, Author, Comment or Favorite.
+
+    Rows are append-only and written in the same transaction as the change;
+    the id is the change-feed cursor.
+    """
+    ACTION_CHOICES = [
+        ('create', 'Create'),
+        ('update', 'Update'),
+        ('delete', 'Delete'),
+    ]
+
+    model = models.CharField(max_length=20)
+    object_id = models.PositiveBigIntegerField()
+    action = models.CharField(max_length=6, choices=ACTION_CHOICES)
+    data = models.JSONField(blank=True, null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [models.Index(fields=['model', 'object_id', 'id'])]
+
+    def __str__(self):
+        return f'#{self.pk} {self.action} {self.model} {self.object_id}'
+
+
+class ChangeLogCompaction(models.Model):
+    """One compaction run; cursors below ``tombstones_through`` may have missed deletes."""
+    tombstones_through = models.PositiveBigIntegerField(default=0)
+    removed = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'Compaction removed {self.removed} entries'
+
+
+class Statistic(models.Model):
+    """
+    One precomputed aggregate for the admin dashboard, e.g. ('decade', '1950')
+    or ('book_favorites', '<book id>').
+
+    Kept current by signal handlers and rebuilt by ``rollup_stats``.
+    """
+    kind = models.CharField(max_length=30)
+    key = models.CharField(max_length=50)
+    label = models.CharField(max_length=300, blank=True)
+    value = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('kind', 'key')
+        indexes = [models.Index(fields=['kind', '-value'])]
+
+    def __str__(self):
+        return f'{self.kind}:{self.key} = {self.value}'
+
+
+class ImportJob(models.Model):
+    """
+    A bulk import started from the admin.
+
+    ``import_catalog --job <id>`` runs it in its own process and records
+    progress here, so every web worker sees the same state and an import
+    outlives the worker that started it.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=10)
+    format = models.CharField(max_length=4)
+    name = models.CharField(max_length=255)
+    path = models.CharField(max_length=500)
+    status = models.CharField(max_length=7, choices=STATUS_CHOICES, default='queued')
+    pid = models.PositiveIntegerField(null=True, blank=True)
+    total_bytes = models.PositiveBigIntegerField(default=0)
+    bytes_read = models.PositiveBigIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    created = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    # Set once a web process has invalidated its catalog caches for this
+    # job; the import process can't reach a process-local cache.
+    catalog_synced = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Bumped with every progress update; a running job that stops bumping it is orphaned.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.kind} import {self.name} ({self.status})'
@@ -0,0 +1,148 @@
+import time
+from functools import wraps
+from typing import Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from . import catalog
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# Query parameters that change what the cached views render. Anything else
+# (tracking parameters, cache busters) maps to the same entry.
+DEFAULT_PARAMS = ('page',)
+
+# Public list views pre-rendered by warm()
+WARMED_VIEWS = ('books:home', 'books:authors', 'books:all_books')
+
+
+def page_key(request, params: Sequence[str] = DEFAULT_PARAMS) -> str:
+    values = sorted((k, v) for k in params for v in request.GET.getlist(k))
+    query = '&'.join(f'{k}={v}' for k, v in values)
+    return f'books:page:{request.path}?{query}'
+
+
+def _cacheable(request) -> bool:
+    if request.method != 'GET' or request.user.is_authenticated:
+        return False
+    # A pending flash message (e.g. after logout) has to be rendered into the page.
+    return not len(getattr(request, '_messages', ()))
+
+
+def _from_entry(entry) -> HttpResponse:
+    response = HttpResponse(entry['content'], content_type=entry['content_type'])
+    response['X-Page-Cache'] = 'stale' if entry.get('stale') else 'hit'
+    return response
+
+
+def _store(key, response, version) -> None:
+    if response.status_code != 200 or response.streaming:
+        return
+    if hasattr(response, 'render') and not response.is_rendered:
+        response.render()
+    cache.set(key, {
+        'version': version,
+        'expires': time.time() + _setting('PAGE_CACHE_TIMEOUT', 300),
+        'content': response.content,
+        'content_type': response['Content-Type'],
+    }, timeout=_setting('PAGE_CACHE_STALE_TIMEOUT', 3600))
+
+
+def _rebuild(view, key, version, request, *args, **kwargs) -> Optional[HttpResponse]:
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, 1, timeout=_setting('PAGE_CACHE_LOCK_TIMEOUT', 30)):
+        return None
+    try:
+        response = view(request, *args, **kwargs)
+        _store(key, response, version)
+        return response
+    finally:
+        cache.delete(lock_key)
+
+
+def anonymous_page_cache(view=None, *, params: Sequence[str] = DEFAULT_PARAMS):
+    """
+    Cache a public page for anonymous visitors with single-flight recomputation.
+
+    Entries are tagged with the catalog version. When one is stale, the first
+    worker to take the per-key lock re-renders it while the others keep serving
+    the stale copy; when there is no copy at all they wait briefly for it.
+    Only the query parameters in ``params`` are part of the cache key.
+    """
+    if view is None:
+        return lambda view: anonymous_page_cache(view, params=params)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not _cacheable(request):
+            return view(request, *args, **kwargs)
+
+        key = page_key(request, params)
+        version = catalog.get_version()
+        entry = cache.get(key)
+        if entry and entry['version'] == version and entry['expires'] > time.time():
+            return _from_entry(entry)
+
+        response = _rebuild(view, key, version, request, *args, **kwargs)
+        if response is not None:
+            return response
+
+        if entry:
+            entry['stale'] = True
+            return _from_entry(entry)
+
+        deadline = time.monotonic() + _setting('PAGE_CACHE_WAIT_TIMEOUT', 2.0)
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = cache.get(key)
+            if entry:
+                return _from_entry(entry)
+        return view(request, *args, **kwargs)
+
+    def refresh(request, *args, **kwargs) -> Optional[HttpResponse]:
+        """Re-render and store ``request`` unless another worker is already on it."""
+        return _rebuild(view, page_key(request, params), catalog.get_version(), request, *args, **kwargs)
+
+    wrapper.refresh = refresh
+    return wrapper
+
+
+def warm(pages: int) -> Tuple[int, int]:
+    """
+    Render the first ``pages`` pages of each of WARMED_VIEWS into the cache.
+
+    Returns ``(warmed, skipped)``; a page is skipped when another worker is
+    already rendering it.
+    """
+    from django.contrib.auth.models import AnonymousUser
+    from django.test import RequestFactory
+    from django.urls import resolve, reverse
+
+    factory = RequestFactory()
+    warmed = skipped = 0
+    for name in WARMED_VIEWS:
+        path = reverse(name)
+        view = resolve(path).func
+        for page in range(1, pages + 1):
+            request = factory.get(path, {'page': page} if page > 1 else {})
+            request.user = AnonymousUser()
+            response = view.refresh(request)
+            if response is None:
+                skipped += 1
+                continue
+            warmed += 1
+            # get_page() clamps to the last page, so stop once we've passed it.
+            if b'Next' not in response.content:
+                break
+    return warmed, skipped
+
+
+def is_process_local(alias: str = 'default') -> bool:
+    """True when each process has its own copy of the cache (or none at all)."""
+    backend = settings.CACHES[alias]['BACKEND']
+    return backend.endswith(('.LocMemCache', '.DummyCache'))
@@ -0,0 +1,186 @@
+import gzip
+import json
+import os
+import time
+import zlib
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.utils import timezone
+
+from . import changelog, recommendations, stats
+from .models import Comment, Favorite
+
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def iter_id_chunks(queryset, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[int]]:
+    """
+    Yield primary keys of ``queryset`` a chunk at a time by keyset pagination.
+
+    Each chunk is a fresh ``pk > last`` query, so rows deleted between chunks
+    are simply not seen again and memory never holds more than one chunk.
+    """
+    last = None
+    while True:
+        chunk = queryset if last is None else queryset.filter(pk__gt=last)
+        ids = list(chunk.order_by('pk').values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return
+        yield ids
+        last = ids[-1]
+
+
+# Raw deletes. These skip signals, so each applies the derived-data updates
+# the signal handlers would have made, batched per chunk.
+
+def _raw_delete_comments(ids: List[int]) -> int:
+    rows = list(Comment.objects.filter(pk__in=ids).values_list('pk', 'book_id', 'user_id'))
+    deleted = Comment.objects.filter(pk__in=ids)._raw_delete(Comment.objects.db)
+
+    stats.add('total', 'comments', -len(rows))
+    stats.subtract_many('book_comments', Counter(book_id for _, book_id, _ in rows))
+    stats.subtract_many('user_activity', Counter(user_id for _, _, user_id in rows))
+    changelog.record_bulk(
+        [Comment(pk=pk, book_id=book_id, user_id=user_id) for pk, book_id, user_id in rows], 'delete'
+    )
+    return deleted
+
+
+def _raw_delete_favorites(ids: List[int]) -> int:
+    rows = list(Favorite.objects.filter(pk__in=ids).values_list('pk', 'book_id', 'user_id', 'created_at'))
+    deleted = Favorite.objects.filter(pk__in=ids)._raw_delete(Favorite.objects.db)
+
+    stats.add('total', 'favorites', -len(rows))
+    stats.subtract_many('book_favorites', Counter(book_id for _, book_id, _, _ in rows))
+    stats.subtract_many('user_activity', Counter(user_id for _, _, user_id, _ in rows))
+    by_user = {}
+    for pk, book_id, user_id, created_at in rows:
+        by_user.setdefault(user_id, []).append((created_at, pk, book_id))
+    for user_id, removed in by_user.items():
+        recommendations.favorites_removed(user_id, removed)
+    changelog.record_bulk(
+        [Favorite(pk=pk, book_id=book_id, user_id=user_id) for pk, book_id, user_id, _ in rows], 'delete'
+    )
+    return deleted
+
+
+RAW_DELETERS: Dict[type, Callable[[List[int]], int]] = {
+    Comment: _raw_delete_comments,
+    Favorite: _raw_delete_favorites,
+}
+
+
+def delete_in_chunks(queryset, chunk_size: int = DEFAULT_CHUNK_SIZE, pause: float = 0) -> int:
+    """
+    Delete ``queryset`` one chunk per transaction, so SQLite's write lock is
+    held briefly and other requests can commit between chunks.
+
+    Comments and favorites are deleted raw; anything else goes through the
+    ORM one chunk at a time, which keeps its own cascades and signals intact.
+    """
+    model = queryset.model
+    raw_delete = RAW_DELETERS.get(model)
+    deleted = 0
+    for ids in iter_id_chunks(queryset, chunk_size):
+        with transaction.atomic():
+            if raw_delete:
+                deleted += raw_delete(ids)
+            else:
+                deleted += model._base_manager.filter(pk__in=ids).delete()[0]
+        if pause:
+            time.sleep(pause)
+    return deleted
+
+
+def _cascading_relations(model):
+    return [
+        relation for relation in model._meta.related_objects
+        if not relation.many_to_many and relation.on_delete is models.CASCADE
+    ]
+
+
+def count_dependents(model, pks: List[int]) -> Dict[type, int]:
+    """How many rows stream_delete() would drain for the ``model`` rows ``pks``, per related model."""
+    counts = {}
+    for relation in _cascading_relations(model):
+        count = relation.related_model._base_manager.filter(**{f'{relation.field.name}__in': pks}).count()
+        if count:
+            counts[relation.related_model] = counts.get(relation.related_model, 0) + count
+    return counts
+
+
+def stream_delete(instance, chunk_size: int = DEFAULT_CHUNK_SIZE, pause: float = 0) -> Dict[str, int]:
+    """
+    Delete ``instance`` after removing its cascading dependents in chunks.
+
+    A plain ``delete()`` has the collector load every related row (and run
+    every signal) in one transaction first; here the big one-to-many
+    relations are drained chunk by chunk, and the final delete only has
+    the object itself left. Call it outside any transaction, or the chunks
+    all end up in that one.
+    """
+    counts = {}
+    for relation in _cascading_relations(instance._meta.model):
+        related = relation.related_model._base_manager.filter(**{relation.field.name: instance})
+        deleted = delete_in_chunks(related, chunk_size, pause)
+        if deleted:
+            label = relation.related_model._meta.label
+            counts[label] = counts.get(label, 0) + deleted
+
+    instance.delete()
+    counts[instance._meta.label] = 1
+    return counts
+
+
+# Archival
+
+def archive_path(name: str) -> Path:
+    directory = Path(getattr(settings, 'ARCHIVE_DIR', Path(settings.BASE_DIR) / 'var' / 'archive'))
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / f"{name}-{timezone.now().strftime('%Y%m%dT%H%M%S')}.ndjson.gz"
+
+
+def archive_comments(
+    before: datetime,
+    path: Optional[Path] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    delete: bool = True,
+    pause: float = 0,
+) -> Dict:
+    """
+    Write comments created before ``before`` to gzipped NDJSON, then delete them.
+
+    Each chunk is flushed and fsynced before its rows are deleted, so a crash
+    leaves a readable archive holding at least every deleted comment; a rerun
+    may repeat the last chunk, which the ``id`` field lets readers drop.
+    """
+    path = Path(path or archive_path('comments'))
+    queryset = Comment.objects.filter(created_at__lt=before)
+    archived = deleted = 0
+
+    with open(path, 'ab') as raw, gzip.GzipFile(fileobj=raw, mode='ab') as out:
+        for ids in iter_id_chunks(queryset, chunk_size):
+            rows = Comment.objects.filter(pk__in=ids).order_by('pk').values(
+                'id', 'book_id', 'book__title', 'user_id', 'user__username', 'content', 'created_at', 'updated_at',
+            )
+            for row in rows:
+                out.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False).encode() + b'\n')
+                archived += 1
+            out.flush(zlib.Z_FULL_FLUSH)
+            raw.flush()
+            os.fsync(raw.fileno())
+
+            if delete:
+                with transaction.atomic():
+                    deleted += _raw_delete_comments(ids)
+                if pause:
+                    time.sleep(pause)
+
+    return {'path': str(path), 'archived': archived, 'deleted': deleted}
@@ -0,0 +1,256 @@
+import heapq
+import math
+import threading
+from collections import Counter, defaultdict
+from itertools import combinations
+from typing import Dict, Iterable, List, Set, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import BookCooccurrence, Favorite, Recommendation
+
+
+# Users with more favorites than this only contribute their most recent ones,
+# which keeps the pair count per user (and the matrix) bounded.
+MAX_ITEMS_PER_USER = 200
+
+
+def _top_k() -> int:
+    return getattr(settings, 'RECOMMENDATIONS_PER_USER', 10)
+
+
+def score_candidates(
+    favorites: Iterable[int],
+    row: Dict[int, Dict[int, int]],
+    popularity: Dict[int, int],
+    k: int,
+) -> List[Tuple[int, float]]:
+    """
+    Rank books by summed cosine similarity to the user's favorites.
+
+    ``row[i]`` is the sparse co-occurrence row of favorite ``i`` and
+    ``popularity`` the matrix diagonal.
+    """
+    favorites = set(favorites)
+    scores = Counter()
+    for book_id in favorites:
+        norm_i = popularity.get(book_id) or 1
+        for other_id, count in row.get(book_id, {}).items():
+            if other_id in favorites:
+                continue
+            scores[other_id] += count / math.sqrt(norm_i * (popularity.get(other_id) or 1))
+    return heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+
+
+def _user_favorites() -> Dict[int, List[int]]:
+    by_user = defaultdict(list)
+    rows = Favorite.objects.order_by('user_id', '-created_at', '-id').values_list('user_id', 'book_id')
+    for user_id, book_id in rows.iterator(chunk_size=10000):
+        items = by_user[user_id]
+        if len(items) < MAX_ITEMS_PER_USER:
+            items.append(book_id)
+    return by_user
+
+
+def rebuild_all(batch_size: int = 5000) -> Dict[str, int]:
+    """Recompute the whole co-occurrence matrix and every user's top-k from Favorite."""
+    by_user = _user_favorites()
+
+    matrix = defaultdict(Counter)
+    for items in by_user.values():
+        for book_id in items:
+            matrix[book_id][book_id] += 1
+        for a, b in combinations(items, 2):
+            matrix[a][b] += 1
+            matrix[b][a] += 1
+    popularity = {book_id: row[book_id] for book_id, row in matrix.items()}
+
+    k = _top_k()
+    with transaction.atomic():
+        BookCooccurrence.objects.all().delete()
+        BookCooccurrence.objects.bulk_create(
+            (
+                BookCooccurrence(book_id=book_id, other_id=other_id, count=count)
+                for book_id, row in matrix.items()
+                for other_id, count in row.items()
+            ),
+            batch_size=batch_size,
+        )
+
+        Recommendation.objects.all().delete()
+        Recommendation.objects.bulk_create(
+            (
+                Recommendation(user_id=user_id, book_id=book_id, score=score, rank=rank)
+                for user_id, items in by_user.items()
+                for rank, (book_id, score) in enumerate(score_candidates(items, matrix, popularity, k), 1)
+            ),
+            batch_size=batch_size,
+        )
+
+    return {
+        'users': len(by_user),
+        'books': len(matrix),
+        'cells': sum(len(row) for row in matrix.values()),
+        'recommendations': Recommendation.objects.count(),
+    }
+
+
+def refresh_user(user_id: int) -> None:
+    """Recompute one user's top-k from the stored matrix."""
+    favorites = list(
+        Favorite.objects.filter(user_id=user_id)
+        .order_by('-created_at', '-id')
+        .values_list('book_id', flat=True)[:MAX_ITEMS_PER_USER]
+    )
+
+    row = defaultdict(dict)
+    for book_id, other_id, count in BookCooccurrence.objects.filter(book_id__in=favorites).values_list(
+        'book_id', 'other_id', 'count'
+    ):
+        row[book_id][other_id] = count
+    candidates = {other_id for cells in row.values() for other_id in cells}
+    popularity = dict(
+        BookCooccurrence.objects.filter(book_id__in=candidates | set(favorites), other_id=F('book_id'))
+        .values_list('book_id', 'count')
+    )
+
+    ranked = score_candidates(favorites, row, popularity, _top_k())
+    with transaction.atomic():
+        Recommendation.objects.filter(user_id=user_id).delete()
+        Recommendation.objects.bulk_create(
+            Recommendation(user_id=user_id, book_id=book_id, score=score, rank=rank)
+            for rank, (book_id, score) in enumerate(ranked, 1)
+        )
+
+
+def _create_cells(cells: List[BookCooccurrence]) -> None:
+    try:
+        with transaction.atomic():
+            BookCooccurrence.objects.bulk_create(cells)
+    except IntegrityError:
+        # Some were created concurrently; add to those instead, one by one.
+        for cell in cells:
+            pair = BookCooccurrence.objects.filter(book_id=cell.book_id, other_id=cell.other_id)
+            if pair.update(count=F('count') + cell.count):
+                continue
+            try:
+                with transaction.atomic():
+                    cell.save(force_insert=True)
+            except IntegrityError:
+                pair.update(count=F('count') + cell.count)
+
+
+def _add_cells(cells: Dict[Tuple[int, int], int], pivots: Set[int]) -> None:
+    """
+    Add each delta to its (book, other) cell with atomic ``F()`` updates.
+
+    Every cell has at least one endpoint in ``pivots``, so grouping by that
+    endpoint takes a couple of queries per pivot rather than one per cell.
+    Cells that reach zero are dropped and missing ones created.
+    """
+    groups = defaultdict(list)
+    for (book_id, other_id), delta in cells.items():
+        if book_id in pivots:
+            groups['book_id', book_id, delta].append(other_id)
+        else:
+            groups['other_id', other_id, delta].append(book_id)
+
+    for (field, pivot, delta), others in groups.items():
+        other_field = 'other_id' if field == 'book_id' else 'book_id'
+        group = BookCooccurrence.objects.filter(**{field: pivot, f'{other_field}__in': others})
+        if delta < 0:
+            # Drop what would reach zero first; count is unsigned.
+            group.filter(count__lte=-delta).delete()
+            group.update(count=F('count') + delta)
+            continue
+        group.update(count=F('count') + delta)
+        existing = set(group.values_list(other_field, flat=True))
+        _create_cells([
+            BookCooccurrence(**{field: pivot, other_field: other}, count=delta)
+            for other in others if other not in existing
+        ])
+
+
+def _shift_window(before: List[int], after: List[int]) -> None:
+    """
+    Move one user's contribution to the matrix from window ``before`` to ``after``.
+
+    A user adds one to every pair (and diagonal) inside their window of most
+    recent favorites, as in rebuild_all(); only pairs touching a book that
+    left or entered the window change.
+    """
+    before, after = set(before), set(after)
+    common = before & after
+    cells = {}
+    for changed, delta in ((before - after, -1), (after - before, 1)):
+        for book_id in changed:
+            for other_id in common | changed:
+                cells[book_id, other_id] = delta
+                cells[other_id, book_id] = delta
+    _add_cells(cells, before ^ after)
+
+
+def _window_rows(user_id: int) -> List[Tuple]:
+    """``(created_at, id, book_id)`` of the user's newest favorites, one past the window."""
+    return list(
+        Favorite.objects.filter(user_id=user_id)
+        .order_by('-created_at', '-id')
+        .values_list('created_at', 'id', 'book_id')[:MAX_ITEMS_PER_USER + 1]
+    )
+
+
+def _window(rows: Iterable[Tuple]) -> List[int]:
+    return [book_id for _, _, book_id in sorted(rows, reverse=True)[:MAX_ITEMS_PER_USER]]
+
+
+def _schedule_refresh(user_id: int) -> None:
+    from django.contrib.auth.models import User
+
+    def refresh():
+        if User.objects.filter(pk=user_id).exists():
+            refresh_user(user_id)
+
+    transaction.on_commit(refresh)
+
+
+def favorite_added(favorite: Favorite) -> None:
+    rows = _window_rows(favorite.user_id)
+    _shift_window(_window(row for row in rows if row[1] != favorite.pk), _window(rows))
+    _schedule_refresh(favorite.user_id)
+
+
+# A cascade or queryset delete sends every pre_delete, then deletes all the
+# rows, then sends the post_deletes. By the first post_delete a user's other
+# deleted favorites are already gone, so they are collected up front and
+# accounted for together.
+_deleting = threading.local()
+
+
+def favorite_deleting(favorite: Favorite) -> None:
+    if not hasattr(_deleting, 'pending'):
+        _deleting.pending, _deleting.applied = defaultdict(dict), set()
+    _deleting.pending[favorite.user_id][favorite.pk] = (favorite.created_at, favorite.pk, favorite.book_id)
+
+
+def favorite_removed(favorite: Favorite) -> None:
+    pending = getattr(_deleting, 'pending', {})
+    applied = getattr(_deleting, 'applied', set())
+    if favorite.pk in applied:
+        applied.discard(favorite.pk)
+        return
+    removed = pending.pop(favorite.user_id, {})
+    # Rows whose delete never happened (e.g. it raised) are still there.
+    still_there = set(Favorite.objects.filter(pk__in=list(removed)).values_list('pk', flat=True))
+    removed = {pk: row for pk, row in removed.items() if pk not in still_there}
+    removed[favorite.pk] = (favorite.created_at, favorite.pk, favorite.book_id)
+    applied.update(pk for pk in removed if pk != favorite.pk)
+    favorites_removed(favorite.user_id, list(removed.values()))
+
+
+def favorites_removed(user_id: int, removed: List[Tuple]) -> None:
+    """Account for deleted ``(created_at, id, book_id)`` favorites, e.g. after a raw delete."""
+    rows = _window_rows(user_id)
+    _shift_window(_window(rows + list(removed)), _window(rows))
+    _schedule_refresh(user_id)
@@ -0,0 +1,73 @@
+import hashlib
+from typing import Dict, List
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from . import catalog
+from .models import Author, Book
+from .snapshot import BookCard
+
+
+def normalize_query(query: str) -> str:
+    """Fold case and runs of whitespace so equivalent searches share one cache entry."""
+    return ' '.join(query.lower().split())
+
+
+def _key(query: str) -> str:
+    digest = hashlib.md5(query.encode()).hexdigest()
+    return f'books:search:{catalog.get_version()}:{digest}'
+
+
+def _compute(query: str, limit: int) -> Dict:
+    rows = list(
+        Book.objects.filter(Q(title__icontains=query) | Q(authors__name__icontains=query))
+        .distinct()
+        .values_list('id', 'title', 'publication_year', 'cover_image')[:limit + 1]
+    )
+    truncated = len(rows) > limit
+    rows = rows[:limit]
+
+    author_names = {}
+    through = Book.authors.through.objects.filter(book_id__in=[row[0] for row in rows])
+    for book_id, name in through.values_list('book_id', 'author__name'):
+        author_names.setdefault(book_id, []).append(name)
+
+    authors = list(
+        Author.objects.filter(name__icontains=query)
+        .annotate(book_count=Count('books'))
+        .filter(book_count__gt=0)
+        .order_by('name')
+        .values('id', 'name', 'book_count')[:limit]
+    )
+
+    return {
+        'books': [
+            (book_id, title, tuple(sorted(author_names.get(book_id, ()))), year, cover)
+            for book_id, title, year, cover in rows
+        ],
+        'authors': authors,
+        'truncated': truncated,
+    }
+
+
+def get_results(query: str) -> Dict:
+    """
+    Matching books (as BookCards) and authors for an already-normalized query.
+
+    Results are cached per catalog version, so any Book or Author change
+    invalidates every cached search at once; a repeated search costs no queries.
+    """
+    key = _key(query)
+    results = cache.get(key)
+    if results is None:
+        results = _compute(query, getattr(settings, 'SEARCH_MAX_RESULTS', 500))
+        cache.set(key, results, timeout=getattr(settings, 'SEARCH_CACHE_TIMEOUT', 300))
+
+    books: List[BookCard] = [BookCard(*row) for row in results['books']]
+    return {
+        'books': books,
+        'authors': results['authors'],
+        'truncated': results['truncated'],
+    }
@@ -1,6 +1,14 @@
+import json
+
+from django.db.models import Min
 from rest_framework import serializers
 from .models import Book
 
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
+
 
 class BookSerializer(serializers.ModelSerializer):
     author_name = serializers.SerializerMethodField()
@@ -11,3 +19,33 @@ class BookSerializer(serializers.ModelSerializer):
 
     def get_author_name(self, obj):
         return obj.authors.first().name if obj.authors.exists() else "Unknown Author"
+
+
+def book_list_rows(rows):
+    """
+    ``BookSerializer`` output for ``(id, title, publication_year)`` tuples.
+
+    Resolves ``author_name`` for the whole page with one grouped query instead
+    of two queries per book.
+    """
+    first_authors = dict(
+        Book.authors.through.objects
+        .filter(book_id__in=[row[0] for row in rows])
+        .values('book_id')
+        .annotate(name=Min('author__name'))
+        .values_list('book_id', 'name')
+    )
+    return [
+        {
+            'title': title,
+            'author_name': first_authors.get(book_id, "Unknown Author"),
+            'publication_year': publication_year,
+        }
+        for book_id, title, publication_year in rows
+    ]
+
+
+def dump_json(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode()
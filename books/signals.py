@@ -0,0 +1,201 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import autocomplete, catalog, changelog, recommendations, snapshot, stats
+from .middleware import user_cache_key
+from .models import Author, Book, Comment, Favorite, Statistic
+
+
+@receiver(post_save, sender=Book)
+def index_book(sender, instance, **kwargs):
+    if autocomplete.is_loaded():
+        autocomplete.schedule_add('book', instance.pk, instance.title)
+
+
+@receiver(post_save, sender=Author)
+def index_author(sender, instance, **kwargs):
+    if autocomplete.is_loaded():
+        autocomplete.schedule_add('author', instance.pk, instance.name)
+
+
+@receiver(post_delete, sender=Book)
+def unindex_book(sender, instance, **kwargs):
+    if autocomplete.is_loaded():
+        autocomplete.schedule_remove('book', instance.pk)
+
+
+@receiver(post_delete, sender=Author)
+def unindex_author(sender, instance, **kwargs):
+    if autocomplete.is_loaded():
+        autocomplete.schedule_remove('author', instance.pk)
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+@receiver(m2m_changed, sender=Book.authors.through)
+def catalog_changed(sender, **kwargs):
+    if kwargs.get('action', 'post_').startswith('post_'):
+        transaction.on_commit(autocomplete.bump_version)
+        snapshot.schedule_rebuild()
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_saved(sender, instance, created, **kwargs):
+    if created:
+        recommendations.favorite_added(instance)
+
+
+@receiver(pre_delete, sender=Favorite)
+def favorite_deleting(sender, instance, **kwargs):
+    recommendations.favorite_deleting(instance)
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_deleted(sender, instance, **kwargs):
+    recommendations.favorite_removed(instance)
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_save, sender=Author)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Favorite)
+def log_saved(sender, instance, created, **kwargs):
+    changelog.record(instance, 'create' if created else 'update')
+
+
+@receiver(post_delete, sender=Book)
+@receiver(post_delete, sender=Author)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Favorite)
+def log_deleted(sender, instance, **kwargs):
+    changelog.record(instance, 'delete')
+    # The cascade removed this author from its books without an m2m_changed.
+    book_ids = instance.__dict__.pop('_book_ids', None)
+    if book_ids:
+        for book in Book.objects.filter(pk__in=book_ids):
+            changelog.record(book, 'update')
+
+
+@receiver(pre_delete, sender=Author)
+def remember_author_books(sender, instance, **kwargs):
+    instance._book_ids = list(instance.books.values_list('id', flat=True))
+
+
+@receiver(m2m_changed, sender=Book.authors.through)
+def log_authors_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """A book's author list is part of its logged state, from either side of the relation."""
+    if not reverse:
+        if action.startswith('post_'):
+            changelog.record(instance, 'update')
+        return
+
+    if action == 'pre_clear':
+        instance._cleared_book_ids = list(instance.books.values_list('id', flat=True))
+        return
+    if action == 'post_clear':
+        pk_set = instance.__dict__.pop('_cleared_book_ids', [])
+    if action.startswith('post_') and pk_set:
+        for book in Book.objects.filter(pk__in=pk_set):
+            changelog.record(book, 'update')
+
+
+@receiver(pre_save, sender=Book)
+def remember_book_decade(sender, instance, **kwargs):
+    if not instance._state.adding:
+        old_year = Book.objects.filter(pk=instance.pk).values_list('publication_year', flat=True).first()
+        instance._old_decade = stats.decade_of(old_year)
+
+
+@receiver(post_save, sender=Book)
+def count_book_saved(sender, instance, created, **kwargs):
+    decade = stats.decade_of(instance.publication_year)
+    if created:
+        stats.add('total', 'books', 1)
+        stats.add('decade', decade, 1)
+        return
+    old_decade = instance.__dict__.pop('_old_decade', decade)
+    if old_decade != decade:
+        stats.add('decade', old_decade, -1)
+        stats.add('decade', decade, 1)
+    stats.relabel(['book_favorites', 'book_comments'], instance.pk, instance.title)
+
+
+@receiver(post_delete, sender=Book)
+def count_book_deleted(sender, instance, **kwargs):
+    stats.add('total', 'books', -1)
+    stats.add('decade', stats.decade_of(instance.publication_year), -1)
+    stats.forget(['book_favorites', 'book_comments'], instance.pk)
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_save, sender=User)
+def count_created(sender, instance, created, **kwargs):
+    if created:
+        stats.add('total', 'authors' if sender is Author else 'users', 1)
+
+
+@receiver(post_delete, sender=Author)
+@receiver(post_delete, sender=User)
+def count_deleted(sender, instance, **kwargs):
+    stats.add('total', 'authors' if sender is Author else 'users', -1)
+
+
+def _count_activity(sender, instance, delta):
+    kind, total = ('book_comments', 'comments') if sender is Comment else ('book_favorites', 'favorites')
+    stats.add('total', total, delta)
+    stats.add(kind, instance.book_id, delta, lambda: instance.book.title)
+    stats.activity(instance.user_id, delta)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Favorite)
+def count_activity_saved(sender, instance, created, **kwargs):
+    if created:
+        _count_activity(sender, instance, 1)
+
+
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Favorite)
+def count_activity_deleted(sender, instance, **kwargs):
+    _count_activity(sender, instance, -1)
+
+
+@receiver(post_migrate)
+def initialize_stats(sender, app_config, using=DEFAULT_DB_ALIAS, **kwargs):
+    if app_config.label != 'books':
+        return
+    # After a partial or backwards migrate the tables the rollup reads may
+    # not exist yet, or may lack columns.
+    executor = MigrationExecutor(connections[using])
+    if executor.migration_plan(executor.loader.graph.leaf_nodes()):
+        return
+    if not Statistic.objects.using(using).exists():
+        stats.rollup(using=using)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    key = user_cache_key(instance.pk)
+    cache.delete(key)
+    # Again after commit, in case a concurrent request re-cached the old row.
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def invalidate_catalog():
+    """Mark every catalog-derived cache stale: indexes, snapshot, page and search caches."""
+    # A plain bump: nothing was indexed, so every process's index must rebuild.
+    transaction.on_commit(catalog.bump_version)
+    snapshot.schedule_rebuild()
+
+
+def bulk_catalog_changed():
+    """Catch up derived catalog data after bulk_create()/raw writes that skip signals."""
+    invalidate_catalog()
+    transaction.on_commit(stats.rollup)
@@ -0,0 +1,312 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from array import array
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+
+from . import catalog
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'BKSNAP01'
+PREFIX = struct.Struct('<8sI')
+RECORD = struct.Struct('<qHHHB')
+AUTHOR_SEPARATOR = '\x1f'
+
+
+class BookCard:
+    """The subset of a Book the public list pages render."""
+
+    __slots__ = ('id', 'title', 'author_names', 'publication_year', 'cover_image')
+
+    def __init__(self, id, title, author_names, publication_year, cover_image):
+        self.id = id
+        self.title = title
+        self.author_names = author_names
+        self.publication_year = publication_year
+        self.cover_image = cover_image
+
+    def __str__(self):
+        return self.title
+
+    def get_authors_display(self):
+        return ", ".join(self.author_names)
+
+    def get_cover_url(self):
+        if self.cover_image:
+            return self.cover_image
+        return '/static/images/no-cover.jpg'
+
+
+class CatalogSnapshot(Sequence):
+    """
+    Memory-mapped, read-only list of BookCards in ``Book.Meta.ordering`` order.
+
+    Layout: magic, JSON header length, JSON header padded to 8 bytes, then
+    ``count`` native-endian uint64 record offsets, then the records.
+    Every worker maps the same file, so the page cache holds a single copy.
+    """
+
+    def __init__(self, path, stamp=None):
+        self.path = Path(path)
+        self.stamp = stamp
+        with open(self.path, 'rb') as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, header_len = PREFIX.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f'{self.path} is not a catalog snapshot')
+        header_end = PREFIX.size + header_len
+        self.header = json.loads(self._mm[PREFIX.size:header_end])
+        self.count = self.header['count']
+
+        offsets_start = header_end + (-header_end % 8)
+        offsets_end = offsets_start + self.count * 8
+        self._offsets = memoryview(self._mm)[offsets_start:offsets_end].cast('Q')
+        self._data_start = offsets_end
+
+    @property
+    def total_books(self) -> int:
+        return self.count
+
+    @property
+    def total_authors(self) -> int:
+        return self.header['total_authors']
+
+    @property
+    def latest_year(self) -> Optional[str]:
+        return self.header['latest_year']
+
+    @property
+    def version(self) -> Optional[int]:
+        """Catalog version read just before the tables were, so never newer than the data."""
+        return self.header.get('version')
+
+    def __len__(self):
+        return self.count
+
+    def _read(self, i: int) -> BookCard:
+        mm = self._mm
+        pos = self._data_start + self._offsets[i]
+        book_id, title_len, authors_len, cover_len, year_len = RECORD.unpack_from(mm, pos)
+        pos += RECORD.size
+        title = mm[pos:pos + title_len].decode()
+        pos += title_len
+        authors = mm[pos:pos + authors_len].decode()
+        pos += authors_len
+        cover = mm[pos:pos + cover_len].decode()
+        pos += cover_len
+        year = mm[pos:pos + year_len].decode()
+        return BookCard(
+            book_id,
+            title,
+            authors.split(AUTHOR_SEPARATOR) if authors else [],
+            year or None,
+            cover or None,
+        )
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._read(i) for i in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError('catalog snapshot index out of range')
+        return self._read(index)
+
+
+def snapshot_path() -> Path:
+    return Path(getattr(settings, 'CATALOG_SNAPSHOT_PATH', settings.BASE_DIR / 'var' / 'catalog.snapshot'))
+
+
+def is_enabled() -> bool:
+    return getattr(settings, 'CATALOG_SNAPSHOT_ENABLED', True)
+
+
+def _encode(value: Optional[str], limit: int) -> bytes:
+    data = (value or '').encode()
+    if len(data) > limit:
+        data = data[:limit].decode(errors='ignore').encode()
+    return data
+
+
+def build_snapshot(path=None) -> Path:
+    """Write a fresh snapshot next to ``path`` and atomically swap it in."""
+    from .models import Author, Book
+
+    path = Path(path or snapshot_path())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    version = catalog.get_version()
+
+    author_names = {}
+    through = Book.authors.through.objects.values_list('book_id', 'author__name')
+    for book_id, name in through.iterator(chunk_size=5000):
+        author_names.setdefault(book_id, []).append(name)
+
+    offsets = array('Q', [0])
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.catalog-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as data:
+            size = 0
+            rows = Book.objects.order_by(*Book._meta.ordering).values_list(
+                'id', 'title', 'publication_year', 'cover_image'
+            )
+            for book_id, title, year, cover in rows.iterator(chunk_size=5000):
+                names = sorted(author_names.get(book_id, ()))
+                title_b = _encode(title, 0xFFFF)
+                authors_b = _encode(AUTHOR_SEPARATOR.join(names), 0xFFFF)
+                cover_b = _encode(cover, 0xFFFF)
+                year_b = _encode(year, 0xFF)
+                record = RECORD.pack(book_id, len(title_b), len(authors_b), len(cover_b), len(year_b))
+                data.write(record + title_b + authors_b + cover_b + year_b)
+                size += RECORD.size + len(title_b) + len(authors_b) + len(cover_b) + len(year_b)
+                offsets.append(size)
+        offsets.pop()
+
+        latest = Book.objects.filter(publication_year__isnull=False).order_by('-publication_year').first()
+        header = json.dumps({
+            'count': len(offsets),
+            'total_authors': Author.objects.count(),
+            'latest_year': latest.publication_year if latest else None,
+            'version': version,
+        }).encode()
+        header_end = PREFIX.size + len(header)
+
+        fd, final_tmp = tempfile.mkstemp(dir=path.parent, prefix='.catalog-', suffix='.tmp')
+        with os.fdopen(fd, 'wb') as out, open(tmp_path, 'rb') as records:
+            out.write(PREFIX.pack(MAGIC, len(header)))
+            out.write(header)
+            out.write(b'\0' * (-header_end % 8))
+            out.write(offsets.tobytes())
+            while True:
+                chunk = records.read(1 << 20)
+                if not chunk:
+                    break
+                out.write(chunk)
+        os.replace(final_tmp, path)
+    finally:
+        os.unlink(tmp_path)
+    return path
+
+
+_current: Optional[CatalogSnapshot] = None
+_lock = threading.Lock()
+
+
+def get_snapshot() -> CatalogSnapshot:
+    """Return the mapped snapshot, remapping when another process swapped the file."""
+    global _current
+    path = snapshot_path()
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        with _lock:
+            if not path.exists():
+                build_snapshot(path)
+        st = os.stat(path)
+
+    stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+    current = _current
+    if current is None or current.stamp != stamp:
+        with _lock:
+            if _current is None or _current.stamp != stamp:
+                _current = CatalogSnapshot(path, stamp)
+            current = _current
+    return current
+
+
+def get_current() -> Optional[CatalogSnapshot]:
+    """
+    The snapshot if it matches the current catalog version, else None.
+
+    A stale snapshot also queues a background rebuild; until it lands,
+    callers render from the database instead.
+    """
+    current = get_snapshot()
+    if current.version == catalog.get_version():
+        return current
+    request_rebuild()
+    return None
+
+
+# Rebuilds run on one background thread per process. Writers only mark the
+# snapshot dirty, so a burst of changes costs one rebuild, off the request path.
+
+REBUILD_LOCK_KEY = 'books:catalog-snapshot:rebuild'
+
+_dirty = threading.Event()
+_rebuilder: Optional[threading.Thread] = None
+_rebuilder_lock = threading.Lock()
+# Held while this process rebuilds, so finish_rebuild() can wait for it.
+_building = threading.Lock()
+
+
+def _rebuild_if_dirty() -> None:
+    with _building:
+        if not _dirty.is_set():
+            return
+        _dirty.clear()
+        # One worker rebuilds at a time; the others' readers re-request it
+        # while the snapshot is still stale.
+        if not cache.add(REBUILD_LOCK_KEY, os.getpid(), timeout=300):
+            return
+        try:
+            build_snapshot()
+        except Exception:
+            logger.exception('Catalog snapshot rebuild failed')
+        finally:
+            cache.delete(REBUILD_LOCK_KEY)
+
+
+def _rebuild_forever() -> None:
+    while True:
+        _dirty.wait()
+        # Let the rest of a burst of commits land before reading the tables.
+        time.sleep(getattr(settings, 'CATALOG_SNAPSHOT_REBUILD_DELAY', 0.5))
+        try:
+            _rebuild_if_dirty()
+        finally:
+            connections.close_all()
+
+
+def finish_rebuild() -> None:
+    """
+    Run a pending rebuild now, or wait for the one in progress.
+
+    For short-lived processes such as management commands, whose daemon
+    rebuilder would otherwise die mid-write when they exit.
+    """
+    _rebuild_if_dirty()
+
+
+def _ensure_rebuilder() -> None:
+    global _rebuilder
+    with _rebuilder_lock:
+        # Threads don't survive fork(), so a worker starts its own.
+        if _rebuilder is None or not _rebuilder.is_alive():
+            _rebuilder = threading.Thread(target=_rebuild_forever, name='catalog-snapshot', daemon=True)
+            _rebuilder.start()
+
+
+def request_rebuild() -> None:
+    _dirty.set()
+    _ensure_rebuilder()
+
+
+def schedule_rebuild() -> None:
+    """Mark the snapshot dirty when the surrounding transaction commits."""
+    if is_enabled():
+        # Each change queues its own callback, so whatever survives a
+        # savepoint rollback still marks the snapshot dirty.
+        transaction.on_commit(request_rebuild)
@@ -0,0 +1,150 @@
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Author, Book, Comment, Favorite, Statistic
+
+
+TOP_N = 10
+YEAR_RE = re.compile(r'\d{3,4}')
+
+
+def decade_of(publication_year: Optional[str]) -> str:
+    match = YEAR_RE.search(publication_year or '')
+    return str(int(match.group()) // 10 * 10) if match else 'unknown'
+
+
+# Incremental updates, called from signal handlers inside the change's transaction
+
+def add(kind: str, key, delta: int, label='') -> None:
+    """Adjust one counter; ``label`` may be a callable, evaluated only when the row is new."""
+    key = str(key)
+    stats = Statistic.objects.filter(kind=kind, key=key)
+    if stats.update(value=F('value') + delta, updated_at=timezone.now()):
+        if delta < 0:
+            stats.filter(value__lte=0).delete()
+        return
+    if delta > 0:
+        try:
+            with transaction.atomic():
+                label = label() if callable(label) else label
+                Statistic.objects.create(kind=kind, key=key, label=label[:300], value=delta)
+        except IntegrityError:
+            # Created concurrently; apply our delta to that row instead.
+            stats.update(value=F('value') + delta, updated_at=timezone.now())
+
+
+def subtract_many(kind: str, counts: Dict) -> None:
+    """Decrement many counters of one kind by ``key: count`` in a fixed number of queries."""
+    counts = {str(key): count for key, count in counts.items() if count}
+    if not counts:
+        return
+    now = timezone.now()
+    changed, emptied = [], []
+    for stat in Statistic.objects.select_for_update().filter(kind=kind, key__in=list(counts)):
+        stat.value -= counts[stat.key]
+        stat.updated_at = now
+        (changed if stat.value > 0 else emptied).append(stat)
+    Statistic.objects.bulk_update(changed, ['value', 'updated_at'])
+    Statistic.objects.filter(pk__in=[stat.pk for stat in emptied]).delete()
+
+
+def relabel(kinds: List[str], key, label: str) -> None:
+    Statistic.objects.filter(kind__in=kinds, key=str(key)).exclude(label=label[:300]).update(label=label[:300])
+
+
+def forget(kinds: List[str], key) -> None:
+    Statistic.objects.filter(kind__in=kinds, key=str(key)).delete()
+
+
+def activity(user_id: int, delta: int) -> None:
+    add(
+        'user_activity', user_id, delta,
+        lambda: User.objects.filter(pk=user_id).values_list('username', flat=True).first() or '',
+    )
+
+
+# Full rollup
+
+def _rows(using: str = DEFAULT_DB_ALIAS) -> List[Statistic]:
+    books, authors, users = Book.objects.using(using), Author.objects.using(using), User.objects.using(using)
+    comments, favorites = Comment.objects.using(using), Favorite.objects.using(using)
+    rows = [
+        Statistic(kind='total', key='books', value=books.count()),
+        Statistic(kind='total', key='authors', value=authors.count()),
+        Statistic(kind='total', key='users', value=users.count()),
+        Statistic(kind='total', key='comments', value=comments.count()),
+        Statistic(kind='total', key='favorites', value=favorites.count()),
+    ]
+
+    decades = Counter()
+    for year, count in books.values_list('publication_year').annotate(count=Count('id')).order_by():
+        decades[decade_of(year)] += count
+    rows += [Statistic(kind='decade', key=decade, value=count) for decade, count in decades.items()]
+
+    for kind, related in (('book_favorites', 'favorited_by'), ('book_comments', 'comments')):
+        counts = books.annotate(count=Count(related)).filter(count__gt=0).values_list('id', 'title', 'count')
+        rows += [Statistic(kind=kind, key=str(pk), label=title, value=count) for pk, title, count in counts]
+
+    active = Counter()
+    for queryset in (comments, favorites):
+        active.update(dict(queryset.values_list('user_id').annotate(count=Count('id')).order_by()))
+    usernames = dict(users.filter(pk__in=active).values_list('id', 'username'))
+    rows += [
+        Statistic(kind='user_activity', key=str(pk), label=usernames.get(pk, ''), value=count)
+        for pk, count in active.items()
+    ]
+    return rows
+
+
+def rollup(batch_size: int = 1000, using: str = DEFAULT_DB_ALIAS) -> int:
+    """Recompute every statistic from the source tables and swap them in atomically."""
+    # Counted inside the transaction, so no write lands between the
+    # snapshot and the swap and gets lost.
+    with transaction.atomic(using=using):
+        rows = _rows(using)
+        Statistic.objects.using(using).all().delete()
+        Statistic.objects.using(using).bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+# Reading
+
+def _top(kind: str, value_name: str, n: int) -> List[Dict]:
+    return [
+        {'id': int(key), 'name': label, value_name: value}
+        for key, label, value in Statistic.objects.filter(kind=kind).order_by('-value', 'key')
+        .values_list('key', 'label', 'value')[:n]
+    ]
+
+
+def get_stats(n: int = TOP_N) -> Dict:
+    """
+    The dashboard aggregates, read from Statistic with a few indexed queries
+    no matter how large the catalog is.
+    """
+    totals = {'books': 0, 'authors': 0, 'users': 0, 'comments': 0, 'favorites': 0}
+    decades = []
+    updated_at = None
+    rows = Statistic.objects.filter(kind__in=('total', 'decade')).values_list('kind', 'key', 'value', 'updated_at')
+    for kind, key, value, row_updated_at in rows:
+        updated_at = max(updated_at or row_updated_at, row_updated_at)
+        if kind == 'total':
+            totals[key] = value
+        else:
+            decades.append({'decade': key, 'books': value})
+    decades.sort(key=lambda row: (row['decade'] == 'unknown', row['decade'].zfill(4)))
+
+    return {
+        'totals': totals,
+        'books_per_decade': decades,
+        'most_favorited': _top('book_favorites', 'favorites', n),
+        'most_commented': _top('book_comments', 'comments', n),
+        'active_users': _top('user_activity', 'activity', n),
+        'updated_at': updated_at,
+    }
@@ -1,3 +1,1073 @@
-from django.test import TestCase
+import gzip
+import importlib
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.core.management import CommandError, call_command
+from django.http import Http404, HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.urls import reverse
+
+from . import assets, autocomplete, bulk, catalog, page_cache, purge, recommendations, signals, snapshot, stats, throttling
+from .middleware import ThresholdGZipMiddleware, user_cache_key
+from .models import Author, Book, BookCooccurrence, ChangeLogCompaction, Comment, Favorite, ImportJob, Statistic
+from .utils import OpenLibraryAPI, search_and_create_book
+
+
+class IsolatedStateMixin:
+    """
+    Start every test with empty caches, no per-process indexes and files in a
+    temporary directory. Snapshot rebuilds are recorded instead of threaded,
+    and autocomplete rebuilds run inline.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.tmp = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.enterContext(override_settings(
+            CATALOG_SNAPSHOT_PATH=self.tmp / 'catalog.snapshot',
+            ARCHIVE_DIR=self.tmp / 'archive',
+        ))
+        self.rebuilder = self.enterContext(mock.patch.object(snapshot, '_ensure_rebuilder'))
+        self.enterContext(mock.patch.object(autocomplete, '_start_rebuild', side_effect=autocomplete._rebuild))
+        snapshot._dirty.clear()
+        for cache in caches.all():
+            cache.clear()
+        autocomplete.reset_index()
+
+
+# Autocomplete (user-026)
+
+class PrefixIndexTests(TestCase):
+    def test_search_matches_folded_prefix_in_order(self):
+        index = autocomplete.PrefixIndex()
+        index.load([('book', 1, 'The  Hobbit'), ('book', 2, 'the hunger games'), ('author', 3, 'Tolkien')])
+
+        results = index.search('THE H')
+        self.assertEqual([r['id'] for r in results], [1, 2])
+        self.assertEqual(results[0]['label'], 'The  Hobbit')
+        self.assertEqual(index.search('t', kind='author'), [{'type': 'author', 'id': 3, 'label': 'Tolkien'}])
+        self.assertEqual(index.search('t', limit=1)[0]['id'], 1)
+        self.assertEqual(index.search('   '), [])
+
+    def test_add_replaces_and_remove_discards(self):
+        index = autocomplete.PrefixIndex()
+        index.add('book', 1, 'Dune')
+        index.add('book', 1, 'Dune Messiah')
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.search('dune')[0]['label'], 'Dune Messiah')
+
+        used = index.memory_used
+        index.remove('book', 1)
+        self.assertEqual(index.search('dune'), [])
+        self.assertEqual(index.memory_used, 0)
+        self.assertGreater(used, 0)
+
+    def test_memory_budget_truncates(self):
+        one = autocomplete.PrefixIndex()
+        one.add('book', 1, 'Alpha')
+        index = autocomplete.PrefixIndex(memory_budget=one.memory_used * 2)
+        index.load([('book', i, f'Alpha {i}') for i in range(10)])
+
+        self.assertTrue(index.truncated)
+        self.assertLess(len(index), 10)
+        self.assertLessEqual(index.memory_used, index.memory_budget)
+        self.assertFalse(index.add('book', 99, 'Alpha 99 with a much longer title than the others'))
+
+    def test_search_keeps_its_snapshot_while_writers_swap_keys(self):
+        index = autocomplete.PrefixIndex()
+        index.load([('book', i, f'Book {i:03d}') for i in range(100)])
+        keys, recent = index._arrays
+        index.remove('book', 0)
+        index.add('book', 500, 'Book 500')
+        self.assertEqual((len(keys), recent), (100, []))
+        # Writes don't copy the main array until the recent one is merged in.
+        self.assertIs(index._arrays[0], keys)
+        self.assertEqual(index._arrays[1], [('book 500', 'book', 500)])
+
+    def test_writes_merge_and_drop_stale_keys(self):
+        index = autocomplete.PrefixIndex()
+        index.load([('book', i, f'Book {i:04d}') for i in range(1000)])
+        for i in range(0, 1000, 2):
+            index.remove('book', i)
+        index.add('book', 1, 'Renamed')
+        index.add('book', 3, 'Book 0003')
+        for i in range(autocomplete.MIN_RECENT):
+            index.add('author', i, f'Author {i:04d}')
+
+        keys, recent = index._arrays
+        self.assertEqual(len(keys) + len(recent), len(index))
+        self.assertEqual(len(index), 500 + autocomplete.MIN_RECENT)
+        self.assertEqual([r['id'] for r in index.search('book 000')], [3, 5, 7, 9])
+        self.assertEqual(index.search('renamed')[0]['id'], 1)
+        self.assertEqual(index.search('author 0001', kind='author')[0]['label'], 'Author 0001')
+
+
+class AutocompleteIndexTests(IsolatedStateMixin, TestCase):
+    def test_index_follows_local_changes_without_rebuilding(self):
+        book = Book.objects.create(title='Neuromancer')
+        index = autocomplete.get_index()
+        self.assertEqual(index.search('neuro')[0]['id'], book.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            book.title = 'Count Zero'
+            book.save()
+            Author.objects.create(name='William Gibson')
+
+        self.assertIs(autocomplete.get_index(), index)
+        self.assertEqual(index.search('neuro'), [])
+        self.assertEqual(index.search('count')[0]['id'], book.pk)
+        self.assertEqual(index.search('william')[0]['type'], 'author')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            book.delete()
+        self.assertEqual(autocomplete.get_index().search('count'), [])
+
+    def test_rebuilds_when_another_process_moves_the_version(self):
+        index = autocomplete.get_index()
+        # A write seen only through the shared version, as from another worker.
+        Book.objects.bulk_create([Book(title='Snow Crash')])
+        catalog.bump_version()
+
+        rebuilt = autocomplete.get_index()
+        self.assertIsNot(rebuilt, index)
+        self.assertEqual(rebuilt.version, catalog.get_version())
+        self.assertEqual(rebuilt.search('snow')[0]['label'], 'Snow Crash')
+
+    def test_stale_index_served_while_rebuilding_in_the_background(self):
+        index = autocomplete.get_index()
+        catalog.bump_version()
+        with mock.patch.object(autocomplete, '_start_rebuild') as start:
+            self.assertIs(autocomplete.get_index(), index)
+        start.assert_called_once_with()
+
+    def test_writes_during_a_rebuild_are_replayed(self):
+        autocomplete.get_index()
+        catalog.bump_version()
+        build_index = autocomplete.build_index
+
+        def committed_while_reading(version):
+            # The rebuild read the tables just before this change committed.
+            index = build_index(version)
+            autocomplete._apply('book', 999, 'Committed Meanwhile')
+            return index
+
+        with mock.patch.object(autocomplete, 'build_index', side_effect=committed_while_reading):
+            rebuilt = autocomplete.get_index()
+        self.assertEqual(rebuilt.search('committed')[0]['id'], 999)
+        self.assertIsNone(autocomplete._replay)
+
+    def test_rolled_back_changes_are_not_indexed(self):
+        index = autocomplete.get_index()
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            Book.objects.create(title='Never Committed')
+        self.assertTrue(callbacks)
+        self.assertEqual(index.search('never'), [])
+
+    def test_endpoint(self):
+        book = Book.objects.create(title='Foundation')
+        response = self.client.get(reverse('books:autocomplete'), {'q': 'found', 'type': 'book'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [
+            {'type': 'book', 'id': book.pk, 'label': 'Foundation', 'url': reverse('books:book_detail', args=[book.pk])},
+        ])
+
+
+# Catalog snapshot (user-027)
+
+class CatalogSnapshotTests(IsolatedStateMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.tolkien = Author.objects.create(name='J. R. R. Tolkien')
+        self.lewis = Author.objects.create(name='C. S. Lewis')
+        self.hobbit = Book.objects.create(title='The Hobbit', publication_year='1937', cover_image='http://x/h.jpg')
+        self.hobbit.authors.set([self.tolkien, self.lewis])
+        self.narnia = Book.objects.create(title='Narnia ' + 'é' * 10, publication_year=None)
+
+    def test_round_trip_matches_the_orm(self):
+        path = snapshot.build_snapshot()
+        cards = snapshot.CatalogSnapshot(path)
+
+        expected = list(Book.objects.order_by(*Book._meta.ordering))
+        self.assertEqual(len(cards), len(expected))
+        self.assertEqual([card.id for card in cards], [book.pk for book in expected])
+        hobbit = next(card for card in cards if card.id == self.hobbit.pk)
+        self.assertEqual(hobbit.title, 'The Hobbit')
+        self.assertEqual(hobbit.get_authors_display(), 'C. S. Lewis, J. R. R. Tolkien')
+        self.assertEqual(hobbit.publication_year, '1937')
+        self.assertEqual(hobbit.get_cover_url(), 'http://x/h.jpg')
+        narnia = cards[-1] if cards[-1].id == self.narnia.pk else cards[0]
+        self.assertEqual(narnia.title, self.narnia.title)
+        self.assertIsNone(narnia.publication_year)
+        self.assertEqual(narnia.get_cover_url(), '/static/images/no-cover.jpg')
+        self.assertEqual((cards.total_books, cards.total_authors, cards.latest_year), (2, 2, '1937'))
+        self.assertEqual(cards.version, catalog.get_version())
+        self.assertEqual([c.id for c in cards[::-1]], [c.id for c in reversed(list(cards))])
+        with self.assertRaises(IndexError):
+            cards[2]
+
+    def test_commit_marks_dirty_without_rebuilding_inline(self):
+        snapshot.build_snapshot()
+        with mock.patch.object(snapshot, 'build_snapshot') as build:
+            with self.captureOnCommitCallbacks(execute=True):
+                for i in range(5):
+                    Book.objects.create(title=f'Book {i}')
+        build.assert_not_called()
+        self.assertTrue(snapshot._dirty.is_set())
+        self.rebuilder.assert_called()
+
+    def test_savepoint_rollback_keeps_the_committed_change_dirty(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Book.objects.create(title='Committed')
+            try:
+                with transaction.atomic():
+                    Book.objects.create(title='Rolled back')
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertTrue(snapshot._dirty.is_set())
+
+    def test_stale_snapshot_is_not_served(self):
+        snapshot.build_snapshot()
+        self.assertIsNotNone(snapshot.get_current())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Book.objects.create(title='Brand New')
+        snapshot._dirty.clear()
+        self.assertIsNone(snapshot.get_current())
+        self.assertTrue(snapshot._dirty.is_set())
+
+        response = self.client.get(reverse('books:all_books'))
+        self.assertContains(response, 'Brand New')
+
+        snapshot.build_snapshot()
+        self.assertEqual(len(snapshot.get_current()), 3)
+
+
+# Rendered-page cache (user-028)
+
+class PageCacheTests(IsolatedStateMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.calls = 0
+
+        @page_cache.anonymous_page_cache
+        def view(request):
+            self.calls += 1
+            return HttpResponse(f'render {self.calls}')
+
+        self.view = view
+        self.factory = RequestFactory()
+
+    def get(self, path='/list/', user=None, **params):
+        request = self.factory.get(path, params)
+        request.user = user or AnonymousUser()
+        return self.view(request)
+
+    def test_hit_until_the_catalog_version_moves(self):
+        self.assertEqual(self.get().content, b'render 1')
+        response = self.get()
+        self.assertEqual((response.content, response['X-Page-Cache']), (b'render 1', 'hit'))
+        self.assertEqual(self.get(page='2').content, b'render 2')
+
+        catalog.bump_version()
+        self.assertEqual(self.get().content, b'render 3')
+
+    def test_only_listed_parameters_key_the_entry(self):
+        self.get(page='2')
+        self.assertEqual(self.get(page='2', utm_source='mail', x='1')['X-Page-Cache'], 'hit')
+        self.assertEqual(cache.get(page_cache.page_key(self.factory.get('/list/', {'x': '1'}))), None)
+
+        first = self.factory.get('/list/', {'page': '2', 'sort': 'title'})
+        second = self.factory.get('/list/', {'sort': 'title', 'page': '2'})
+        key = page_cache.page_key(first, ('sort', 'page'))
+        self.assertEqual(key, page_cache.page_key(second, ('page', 'sort')))
+        self.assertEqual(key, 'books:page:/list/?page=2&sort=title')
+
+    def test_stale_copy_served_while_another_worker_rebuilds(self):
+        self.get()
+        catalog.bump_version()
+        key = page_cache.page_key(self.factory.get('/list/'))
+        cache.add(f'{key}:lock', 1)
+
+        response = self.get()
+        self.assertEqual((response.content, response['X-Page-Cache']), (b'render 1', 'stale'))
+        self.assertEqual(self.calls, 1)
+
+        cache.delete(f'{key}:lock')
+        self.assertEqual(self.get().content, b'render 2')
+
+    def test_cold_miss_waits_for_the_rebuilding_worker(self):
+        key = page_cache.page_key(self.factory.get('/list/'))
+        cache.add(f'{key}:lock', 1)
+
+        def other_worker_stores(seconds):
+            page_cache._store(key, HttpResponse('from other worker'), catalog.get_version())
+
+        with mock.patch.object(page_cache.time, 'sleep', side_effect=other_worker_stores):
+            self.assertEqual(self.get().content, b'from other worker')
+        self.assertEqual(self.calls, 0)
+
+    @override_settings(PAGE_CACHE_WAIT_TIMEOUT=0.1)
+    def test_cold_miss_renders_itself_after_waiting(self):
+        key = page_cache.page_key(self.factory.get('/list/'))
+        cache.add(f'{key}:lock', 1)
+        self.assertEqual(self.get().content, b'render 1')
+        self.assertIsNone(cache.get(key))
+
+    def test_authenticated_users_and_expired_entries(self):
+        user = User(username='reader')
+        self.get()
+        self.assertEqual(self.get(user=user).content, b'render 2')
+        self.assertEqual(self.get().content, b'render 1')
+
+        with override_settings(PAGE_CACHE_TIMEOUT=-1):
+            self.get(path='/other/')
+        self.assertEqual(self.get(path='/other/').content, b'render 4')
+
+    def test_preload_warms_the_list_pages(self):
+        Book.objects.create(title='Warm')
+        from book_collection.serving import warm_up
+
+        warm_up()
+        for name in page_cache.WARMED_VIEWS:
+            self.assertEqual(self.client.get(reverse(name))['X-Page-Cache'], 'hit')
+        self.assertContains(self.client.get(reverse('books:all_books')), 'Warm')
+
+    def test_warm_page_cache_command_needs_a_shared_cache(self):
+        with self.assertRaisesMessage(CommandError, 'local to this process'):
+            call_command('warm_page_cache', pages=1, stdout=StringIO())
+
+        shared = {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(self.tmp / 'cache'),
+        }
+        with override_settings(CACHES={'default': shared, 'throttle': shared}):
+            call_command('warm_page_cache', pages=1, stdout=StringIO())
+            self.assertEqual(self.client.get(reverse('books:all_books'))['X-Page-Cache'], 'hit')
+
+
+# Compression and static assets (user-029)
+
+class CompressionTests(TestCase):
+    def test_minifiers(self):
+        css = '/* header */\nbody {\n  color : red ;\n  margin: 0 auto;\n}\na > b , i { x: y; }'
+        self.assertEqual(assets.minify_css(css), 'body{color:red;margin:0 auto}a>b,i{x:y}')
+        self.assertEqual(assets.minify_json('{ "a": [1, 2],\n "b": "é" }'), '{"a":[1,2],"b":"é"}')
+
+    @override_settings(COMPRESS_MIN_SIZE=100)
+    def test_gzip_threshold(self):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+
+        def respond(body):
+            return ThresholdGZipMiddleware(lambda r: HttpResponse(body))(request)
+
+        self.assertFalse(respond('x' * 99).has_header('Content-Encoding'))
+        response = respond('x' * 500)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), b'x' * 500)
+
+    def test_serve_static_prefers_precompressed_variants(self):
+        root = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        (root / 'site.css').write_text('body{}' * 100)
+        (root / 'site.css.gz').write_bytes(gzip.compress(b'body{}' * 100))
+        (root / 'plain.txt').write_text('hello')
+        factory = RequestFactory()
+
+        with override_settings(STATIC_ROOT=root):
+            response = assets.serve_static(factory.get('/static/site.css', HTTP_ACCEPT_ENCODING='br, gzip'), 'site.css')
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(response['Vary'], 'Accept-Encoding')
+            self.assertEqual(response['Content-Type'], 'text/css')
+            self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b'body{}' * 100)
+            response.close()
+
+            response = assets.serve_static(factory.get('/static/site.css'), 'site.css')
+            self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertEqual(response['Cache-Control'], assets.SHORT_LIVED)
+            response.close()
+
+            response = assets.serve_static(factory.get('/static/plain.txt', HTTP_ACCEPT_ENCODING='gzip'), 'plain.txt')
+            self.assertFalse(response.has_header('Vary'))
+            response.close()
+
+            for path in ('missing.css', '../secret'):
+                with self.assertRaises(Http404):
+                    assets.serve_static(factory.get('/static/' + path), path)
+
+
+# Book list API fast path (user-030)
+
+class BookListFastPathTests(IsolatedStateMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        nameless = Author.objects.create(name='')
+        zed = Author.objects.create(name='Zed')
+        amy = Author.objects.create(name='Amy')
+        for i in range(25):
+            book = Book.objects.create(title=f'Book {i:02d}', publication_year=str(1900 + i) if i % 3 else None)
+            if i % 4 == 1:
+                book.authors.set([zed, amy])
+            elif i % 4 == 2:
+                book.authors.set([nameless])
+            elif i % 4 == 3:
+                book.authors.set([zed])
+
+    def fetch(self, fast, **params):
+        with override_settings(BOOK_API_FAST_PATH=fast):
+            return self.client.get(reverse('books:api_books'), params, HTTP_ACCEPT='application/json')
+
+    def test_fast_path_matches_the_serializer(self):
+        for params in ({}, {'page': 2}):
+            slow, fast = self.fetch(False, **params), self.fetch(True, **params)
+            self.assertEqual(fast.status_code, 200)
+            self.assertEqual(fast.json(), slow.json())
+
+        results = self.fetch(True)
+        names = {row['author_name'] for row in results.json()['results']}
+        self.assertEqual(names, {'Amy', '', 'Zed', 'Unknown Author'})
+
+    def test_fast_path_query_count_is_constant(self):
+        with self.assertNumQueries(3):
+            self.fetch(True)
+
+
+# Throttling (user-031)
+
+class SlidingWindowTests(IsolatedStateMixin, TestCase):
+    def hit_at(self, now, limit=10, window=60):
+        with mock.patch.object(throttling.time, 'time', return_value=now):
+            return throttling.hit('test', limit, window)
+
+    def test_limit_within_one_window(self):
+        results = [self.hit_at(600 + i)[0] for i in range(11)]
+        self.assertEqual(results, [True] * 10 + [False])
+        allowed, retry_after = self.hit_at(611)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(retry_after, 660 - 611)
+
+    def test_previous_window_is_weighted_by_overlap(self):
+        for i in range(10):
+            self.hit_at(600 + i)
+        # A quarter into the next window, 7.5 of the old hits still count.
+        self.assertEqual([self.hit_at(675)[0] for _ in range(4)], [True, True, True, False])
+        # Halfway in only 5 do, next to the 3 new ones.
+        self.assertEqual([self.hit_at(690)[0] for _ in range(3)], [True, True, False])
+
+    def test_retry_after_header(self):
+        self.assertEqual(throttling.too_many_requests(1.2)['Retry-After'], '2')
+        self.assertEqual(throttling.parse_rate('5/hour'), (5, 3600))
+
+
+@override_settings(THROTTLE_RATES={'search': '2/min'})
+class ThrottleViewTests(IsolatedStateMixin, TestCase):
+    def test_forwarded_for_cannot_open_new_buckets(self):
+        url = reverse('books:search')
+        statuses = [
+            self.client.get(url, {'q': 'x'}, HTTP_X_FORWARDED_FOR=f'10.0.0.{i}').status_code
+            for i in range(3)
+        ]
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual(self.client.get(url, REMOTE_ADDR='10.1.1.1').status_code, 200)
+        self.assertEqual(throttling.get_metrics()['search'], {'allowed': 3, 'throttled': 1})
+
+    def test_configured_proxies_are_honoured(self):
+        rest = {**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}
+        with override_settings(REST_FRAMEWORK=rest):
+            url = reverse('books:search')
+            for i in range(3):
+                self.assertEqual(self.client.get(url, HTTP_X_FORWARDED_FOR=f'10.0.0.{i}').status_code, 200)
+
+    def test_api_throttle_uses_the_same_identity(self):
+        # DRF reads the rates into the class when it is imported.
+        with mock.patch.object(throttling.AnonRateThrottle, 'THROTTLE_RATES', {'anon': '2/min'}):
+            statuses = [
+                self.client.get(reverse('books:api_books'), HTTP_X_FORWARDED_FOR=f'10.0.0.{i}').status_code
+                for i in range(3)
+            ]
+        self.assertEqual(statuses, [200, 200, 429])
+
+
+# Bulk import/export (user-032)
+
+class JsonStreamTests(TestCase):
+    def parse(self, text, read_size):
+        with mock.patch.object(bulk, 'READ_SIZE', read_size):
+            return list(bulk.iter_json_records(io.StringIO(text)))
+
+    def test_array_and_json_lines_across_read_boundaries(self):
+        records = [{'title': f'Book {i}', 'nested': {'list': [1, '}]', i]}, 'authors': ['A', 'B']} for i in range(20)]
+        array = json.dumps(records, indent=2)
+        lines = '\n'.join(json.dumps(record) for record in records) + '\n'
+        for read_size in (1, 3, 7, 64, 1 << 16):
+            self.assertEqual(self.parse(array, read_size), records)
+            self.assertEqual(self.parse(lines, read_size), records)
+        self.assertEqual(self.parse('[]', 1), [])
+        self.assertEqual(self.parse('', 1), [])
+
+    def test_invalid_input(self):
+        with self.assertRaises(bulk.ImportFormatError):
+            self.parse('[{"a": 1}, 2]', 4)
+        with self.assertRaises(bulk.ImportFormatError):
+            self.parse('{"a": 1}\n{"b": ', 4)
+
+
+class BulkImportTests(IsolatedStateMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.enterContext(override_settings(IMPORT_SPOOL_DIR=self.tmp / 'imports'))
+        self.spawn = self.enterContext(mock.patch.object(bulk, '_spawn'))
+
+    def test_run_import_in_chunks(self):
+        Author.objects.create(name='Existing')
+        data = 'title,authors,publication_year,open_library_key\n' + ''.join(
+            f'Book {i},Existing;New {i % 3},19{i:02d},/works/OL{i % 8}W\n' for i in range(10)
+        )
+        progress = []
+        with self.captureOnCommitCallbacks(execute=True):
+            stats = bulk.run_import(io.BytesIO(data.encode()), 'books', 'csv', chunk_size=4,
+                                    on_progress=lambda s: progress.append(dict(s)))
+
+        self.assertEqual((stats['processed'], stats['created'], stats['skipped']), (10, 8, 2))
+        self.assertEqual([p['processed'] for p in progress], [4, 8, 10])
+        self.assertEqual(stats['bytes_read'], len(data))
+        self.assertEqual(Author.objects.count(), 4)
+        book = Book.objects.get(title='Book 1')
+        self.assertEqual(sorted(book.authors.values_list('name', flat=True)), ['Existing', 'New 1'])
+
+    def test_export_round_trips(self):
+        author = Author.objects.create(name='Ursula K. Le Guin')
+        Book.objects.create(title='The Dispossessed', publication_year='1974').authors.add(author)
+        exported = ''.join(bulk.iter_json(Book.objects.all()))
+        Book.objects.all().delete()
+        bulk.run_import(io.BytesIO(exported.encode()), 'books', 'json')
+        self.assertEqual(
+            list(Book.objects.values_list('title', 'publication_year', 'authors__name')),
+            [('The Dispossessed', '1974', 'Ursula K. Le Guin')],
+        )
+
+    def start(self, data=b'title,authors\nQueued,Someone\n'):
+        return bulk.start_import_job(SimpleUploadedFile('books.csv', data), 'books', 'csv')
+
+    def test_job_runs_out_of_process_and_reports_progress(self):
+        job_id = self.start()
+        self.spawn.assert_called_once()
+        self.assertEqual(bulk.get_job(job_id)['status'], 'queued')
+
+        call_command('import_catalog', job=job_id, stdout=StringIO())
+        job = bulk.get_job(job_id)
+        self.assertEqual((job['status'], job['created'], job['bytes_read']), ('done', 1, job['total_bytes']))
+        self.assertFalse(os.path.exists(ImportJob.objects.get(pk=job_id).path))
+        self.assertTrue(Book.objects.filter(title='Queued').exists())
+
+    def test_failed_and_orphaned_jobs(self):
+        job_id = self.start(b'[{"title": "x"}, 3]')
+        job = ImportJob.objects.get(pk=job_id)
+        job.format = 'json'
+        job.save()
+        with self.assertRaises(bulk.ImportFormatError):
+            bulk.run_job(job_id)
+        self.assertEqual(bulk.get_job(job_id)['status'], 'failed')
+
+        dead = self.start()
+        ImportJob.objects.filter(pk=dead).update(status='running', pid=2 ** 22 + 1)
+        with mock.patch.object(bulk, '_process_alive', return_value=False):
+            self.assertEqual(bulk.get_job(dead)['error'], 'The import process exited before finishing.')
+
+        stuck = self.start()
+        ImportJob.objects.filter(pk=stuck).update(updated_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(bulk.get_job(stuck)['status'], 'failed')
+        self.assertFalse(os.path.exists(ImportJob.objects.get(pk=stuck).path))
+
+    def test_admin_upload_and_progress(self):
+        admin = User.objects.create_superuser('admin', 'a@example.org', 'pw')
+        self.client.force_login(admin)
+        response = self.client.post(reverse('admin:books_book_import'), {
+            'import_file': SimpleUploadedFile('books.csv', b'title\nFrom Admin\n'),
+        })
+        job = ImportJob.objects.get()
+        self.assertRedirects(response, reverse('admin:books_book_import_progress', args=[job.pk]))
+        bulk.run_job(job.pk)
+
+        progress = self.client.get(reverse('admin:books_book_import_progress', args=[job.pk]), {'format': 'json'})
+        self.assertEqual(progress.json()['status'], 'done')
+        self.assertEqual(self.client.get(reverse('admin:books_book_import_progress', args=[999])).status_code, 404)
+
+
+CROSS_PROCESS_SETTINGS = """
+from book_collection.settings import *  # noqa: F401,F403
+
+DATABASES = {'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': %(tmp)r + '/db.sqlite3'}}
+CATALOG_SNAPSHOT_PATH = %(tmp)r + '/snapshot/catalog.snapshot'
+CATALOG_SNAPSHOT_REBUILD_DELAY = 0.05
+IMPORT_SPOOL_DIR = %(tmp)r + '/imports'
+"""
+
+# Plays the web process: a process-local cache, and the real import_catalog
+# subprocess that start_import_job() spawns.
+CROSS_PROCESS_SCRIPT = """
+import json, os, time
+import django; django.setup()
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from books import autocomplete, bulk, snapshot
+from books.models import Book
+
+def wait_for(check, timeout=60):
+    deadline = time.monotonic() + timeout
+    while not check() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return check()
+
+call_command('migrate', verbosity=0)
+Book.objects.create(title='Seed')
+before = (len(snapshot.get_current()), autocomplete.get_index().search('imported'))
+
+upload = SimpleUploadedFile('new.csv', b'title\\nImported One\\nImported Two\\n')
+job_id = bulk.start_import_job(upload, 'books', 'csv')
+wait_for(lambda: bulk.get_job(job_id)['status'] in ('done', 'failed'))
+wait_for(lambda: snapshot.get_current() is not None)
+wait_for(lambda: len(autocomplete.get_index().search('imported')) == 2)
+print(json.dumps({
+    'before': before,
+    'status': bulk.get_job(job_id)['status'],
+    'books': len(snapshot.get_current()),
+    'suggestions': sorted(r['label'] for r in autocomplete.get_index().search('imported')),
+    'leftovers': [name for name in os.listdir(os.path.dirname(snapshot.snapshot_path())) if name.endswith('.tmp')],
+}))
+"""
+
+
+class CrossProcessImportTests(TestCase):
+    def test_web_process_sees_an_import_run_by_the_subprocess(self):
+        tmp = self.enterContext(tempfile.TemporaryDirectory())
+        Path(tmp, 'cross_process_settings.py').write_text(CROSS_PROCESS_SETTINGS % {'tmp': tmp})
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': 'cross_process_settings',
+            'PYTHONPATH': os.pathsep.join([tmp, str(settings.BASE_DIR)]),
+        }
+        result = subprocess.run(
+            [sys.executable, '-c', CROSS_PROCESS_SCRIPT],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, timeout=180,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(json.loads(result.stdout), {
+            'before': [1, []],
+            'status': 'done',
+            'books': 3,
+            'suggestions': ['Imported One', 'Imported Two'],
+            'leftovers': [],
+        })
+
+    def test_finished_job_invalidates_the_catalog_once(self):
+        finished = dict(kind='books', format='csv', path='/nonexistent', status='done')
+        job = ImportJob.objects.create(name='a.csv', created=2, **finished)
+        unwatched = ImportJob.objects.create(name='b.csv', created=1, **finished)
+        with mock.patch('books.signals.invalidate_catalog') as invalidate:
+            bulk.get_job(job.pk)
+            bulk.get_job(job.pk)
+            self.assertEqual(invalidate.call_count, 1)
+            bulk.sync_finished_jobs()
+            bulk.sync_finished_jobs()
+            self.assertEqual(invalidate.call_count, 2)
+        self.assertTrue(ImportJob.objects.get(pk=unwatched.pk).catalog_synced)
+
+
+# Cached sessions and users (user-033)
+
+class CachedUserTests(IsolatedStateMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('reader', password='secret-pass-1')
+        self.client.force_login(self.user)
+
+    def user_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('books:user_dashboard'))
+        return response, [q['sql'] for q in queries if 'FROM "auth_user"' in q['sql']]
+
+    def test_user_row_is_served_from_the_cache(self):
+        response, queries = self.user_queries()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        self.assertIsNotNone(cache.get(user_cache_key(self.user.pk)))
+
+        response, queries = self.user_queries()
+        self.assertEqual((response.status_code, queries), (200, []))
+
+    def test_saving_the_user_evicts_it(self):
+        self.user_queries()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        response, _ = self.user_queries()
+        self.assertEqual(response.status_code, 302)
+
+    def test_inactive_cached_row_is_rejected(self):
+        self.user_queries()
+        # A stale entry another worker might hold, for a user deactivated without signals.
+        stale = cache.get(user_cache_key(self.user.pk))
+        stale.is_active = False
+        cache.set(user_cache_key(self.user.pk), stale)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        response, queries = self.user_queries()
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(queries), 1)
+
+    def test_password_change_invalidates_other_sessions(self):
+        self.user_queries()
+        User.objects.filter(pk=self.user.pk).update(password='changed')
+        cached = cache.get(user_cache_key(self.user.pk))
+        cached.password = 'changed'
+        cache.set(user_cache_key(self.user.pk), cached)
+
+        response, _ = self.user_queries()
+        self.assertEqual(response.status_code, 302)
+
+    def test_logout_ends_the_cached_session(self):
+        self.user_queries()
+        self.client.get(reverse('books:logout'))
+        response, _ = self.user_queries()
+        self.assertEqual(response.status_code, 302)
+
+
+# Incremental recommendations (user-034)
+
+class IncrementalCooccurrenceTests(IsolatedStateMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.enterContext(mock.patch.object(recommendations, 'MAX_ITEMS_PER_USER', 3))
+        self.books = [Book.objects.create(title=f'Book {i}') for i in range(8)]
+        self.users = [User.objects.create_user(f'reader{i}', password='pw') for i in range(4)]
+
+    def matrix(self):
+        return set(BookCooccurrence.objects.values_list('book_id', 'other_id', 'count'))
+
+    def assertMatchesRebuild(self):
+        incremental = self.matrix()
+        recommendations.rebuild_all()
+        self.assertEqual(incremental, self.matrix())
+
+    def test_signals_match_rebuild_beyond_the_window(self):
+        rng = random.Random(34)
+        for _ in range(60):
+            user, book = rng.choice(self.users), rng.choice(self.books)
+            favorite = Favorite.objects.filter(user=user, book=book).first()
+            if favorite:
+                favorite.delete()
+            else:
+                Favorite.objects.create(user=user, book=book)
+        self.assertMatchesRebuild()
+
+    def test_raw_purge_matches_rebuild(self):
+        for user in self.users:
+            for book in self.books[:6]:
+                Favorite.objects.create(user=user, book=book)
+        purge.delete_in_chunks(Favorite.objects.filter(book__in=self.books[3:5]), chunk_size=3)
+        self.assertMatchesRebuild()
+
+    def favorite_everything(self):
+        for user in self.users:
+            for book in self.books[:5]:
+                Favorite.objects.create(user=user, book=book)
+
+    def test_queryset_delete_matches_rebuild(self):
+        self.favorite_everything()
+        Favorite.objects.filter(user=self.users[0]).delete()
+        Favorite.objects.filter(book__in=self.books[1:3]).delete()
+        self.assertMatchesRebuild()
+
+    def test_cascading_deletes_match_rebuild(self):
+        self.favorite_everything()
+        self.users[1].delete()
+        self.books[4].delete()
+        self.assertMatchesRebuild()
+
+    def test_concurrently_created_cell_is_added_to(self):
+        a, b = self.books[:2]
+        cells = [BookCooccurrence(book=a, other=b, count=1), BookCooccurrence(book=b, other=a, count=1)]
+        BookCooccurrence.objects.create(book=a, other=b, count=2)
+        recommendations._create_cells(cells)
+        self.assertEqual(self.matrix(), {(a.pk, b.pk, 3), (b.pk, a.pk, 1)})
+
+
+# Preforked serving (user-035)
+
+class ProductionCacheSettingsTests(TestCase):
+    def load(self, **env):
+        env = {'DJANGO_SECRET_KEY': 'test', **env}
+        with mock.patch.dict(os.environ, env):
+            for name in ('DJANGO_REDIS_URL', 'DJANGO_CACHE_DIR'):
+                if name not in env:
+                    os.environ.pop(name, None)
+            sys.modules.pop('book_collection.production', None)
+            try:
+                return importlib.import_module('book_collection.production')
+            finally:
+                sys.modules.pop('book_collection.production', None)
+
+    def test_several_workers_need_a_shared_cache(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, 'DJANGO_REDIS_URL'):
+            self.load(DJANGO_WORKERS='4')
+
+    def test_single_worker_keeps_the_in_memory_cache(self):
+        production = self.load(DJANGO_WORKERS='1')
+        self.assertTrue(production.CACHES['default']['BACKEND'].endswith('LocMemCache'))
+
+    def test_cache_dir_selects_a_file_based_cache(self):
+        production = self.load(DJANGO_WORKERS='4', DJANGO_CACHE_DIR='/srv/books-cache')
+        self.assertEqual(
+            {alias: config['LOCATION'] for alias, config in production.CACHES.items()},
+            {'default': '/srv/books-cache/default', 'throttle': '/srv/books-cache/throttle'},
+        )
+
+    def test_redis_url_selects_redis(self):
+        production = self.load(DJANGO_WORKERS='4', DJANGO_REDIS_URL='redis://cache:6379/0')
+        self.assertTrue(production.CACHES['default']['BACKEND'].endswith('RedisCache'))
+
+    def test_serve_refuses_workers_without_a_shared_cache(self):
+        with self.assertRaisesMessage(CommandError, 'in-memory'):
+            call_command('serve', '127.0.0.1:0', '--workers', '2')
+
+
+# Change feed (user-036)
+
+class ChangeFeedTests(IsolatedStateMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.books = [Book.objects.create(title=f'Feed {i}') for i in range(5)]
+        self.client.force_login(User.objects.create_user('staff', password='pw', is_staff=True))
+
+    def feed(self, **params):
+        return self.client.get(reverse('books:api_changes'), {'models': 'book', **params})
+
+    def test_cursor_pages_through_entries_in_order(self):
+        first = self.feed(limit=3).json()
+        self.assertTrue(first['has_more'])
+        second = self.feed(limit=3, cursor=first['cursor']).json()
+        self.assertFalse(second['has_more'])
+        self.assertEqual(
+            [change['object_id'] for change in first['changes'] + second['changes']],
+            [book.pk for book in self.books],
+        )
+        self.assertEqual(self.feed(cursor=second['cursor']).json()['changes'], [])
+
+    def test_cursor_below_the_compaction_horizon_is_gone(self):
+        head = self.feed().json()['cursor']
+        ChangeLogCompaction.objects.create(tombstones_through=head)
+        response = self.feed(cursor=head - 1)
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(response.json()['cursor'], head)
+        self.assertEqual(self.feed(cursor=head).status_code, 200)
+
+    def test_non_finite_wait_is_rejected(self):
+        for wait in ('nan', 'inf', '-inf', 'soon'):
+            with self.subTest(wait=wait):
+                self.assertEqual(self.feed(wait=wait).status_code, 400)
+
+    def test_staff_only(self):
+        self.client.logout()
+        self.assertEqual(self.feed().status_code, 403)
+
+
+# Search (user-037)
+
+class SearchViewTests(IsolatedStateMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        author = Author.objects.create(name='Ursula K. Le Guin')
+        self.book = Book.objects.create(title='The Left Hand of Darkness')
+        self.book.authors.add(author)
+
+    def search(self, q):
+        return self.client.get(reverse('books:search'), {'q': q})
+
+    def test_query_is_shown_as_typed(self):
+        response = self.search('  Left  Hand ')
+        self.assertEqual(response.context['query'], 'Left  Hand')
+        self.assertEqual(response.context['book_count'], 1)
+        self.assertContains(response, 'Results for: "Left  Hand"')
+
+    def test_equivalent_queries_share_the_cached_results(self):
+        self.search('Le Guin')
+        with self.assertNumQueries(0):
+            response = self.search(' le   GUIN')
+        self.assertEqual(response.context['author_count'], 1)
+        self.assertEqual(response.context['query'], 'le   GUIN')
+
+    def test_blank_query_runs_no_search(self):
+        with self.assertNumQueries(0):
+            response = self.search('   ')
+        self.assertIsNone(response.context['books'])
+
+
+# Dashboard statistics (user-038)
+
+class StatisticsTests(IsolatedStateMixin, TestCase):
+    def snapshot(self):
+        return set(Statistic.objects.values_list('kind', 'key', 'label', 'value'))
+
+    def test_signals_match_rollup(self):
+        books = [
+            Book.objects.create(title=f'Stat {i}', publication_year=year)
+            for i, year in enumerate(['1951', '1958', '2003', None, 'c. 1890'])
+        ]
+        books[0].authors.add(Author.objects.create(name='Asimov'))
+        users = [User.objects.create_user(f'counter{i}', password='pw') for i in range(3)]
+        for user in users:
+            for book in books[:3]:
+                Favorite.objects.create(user=user, book=book)
+            Comment.objects.create(user=user, book=books[1], content='Good')
+        Favorite.objects.filter(book=books[2]).first().delete()
+        books[1].title = 'Stat renamed'
+        books[1].save()
+        books[4].delete()
+        purge.delete_in_chunks(Comment.objects.filter(user=users[0]))
+
+        incremental = self.snapshot()
+        stats.rollup()
+        self.assertEqual(incremental, self.snapshot())
+        self.assertEqual(stats.get_stats()['totals']['favorites'], 8)
+
+    def test_initial_rollup_waits_for_a_fully_migrated_database(self):
+        app_config = mock.Mock(label='books')
+        Statistic.objects.all().delete()
+        with mock.patch.object(stats, 'rollup') as rollup:
+            with mock.patch.object(signals.MigrationExecutor, 'migration_plan', return_value=[object()]):
+                signals.initialize_stats(sender=None, app_config=app_config, using='default')
+            rollup.assert_not_called()
+
+            signals.initialize_stats(sender=None, app_config=app_config, using='default')
+            rollup.assert_called_once_with(using='default')
+
+
+# Open Library stand-in (user-039)
+
+class OpenLibraryMockTests(IsolatedStateMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        from benchmarks.mock_openlibrary import start_server
+
+        self.server = start_server(synthesize=True, seed=0)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.enterContext(override_settings(
+            OPEN_LIBRARY_BASE_URL=self.server.url + '/',
+            OPEN_LIBRARY_COVERS_URL=self.server.url + '/b',
+            OPEN_LIBRARY_TIMEOUT=5,
+        ))
+
+    def test_urls_follow_settings(self):
+        self.assertEqual(OpenLibraryAPI.SEARCH_URL, self.server.url + '/search.json')
+        self.assertEqual(OpenLibraryAPI.get_cover_url(42), self.server.url + '/b/id/42-M.jpg')
+
+    def test_import_from_the_fixtures(self):
+        book = search_and_create_book('hobbit')
+        self.assertEqual((book.title, book.open_library_key), ('The Hobbit', '/works/OL262758W'))
+        self.assertEqual([author.name for author in book.authors.all()], ['J.R.R. Tolkien'])
+        self.assertEqual(search_and_create_book('The Hobbit'), book)
+        self.assertEqual(OpenLibraryAPI.get_book_details(book.open_library_key)['key'], book.open_library_key)
+
+    def test_unknown_titles_get_a_stable_synthetic_result(self):
+        first = OpenLibraryAPI.search_books('Some Unlisted Novel')
+        self.assertEqual(first, OpenLibraryAPI.search_books('some unlisted novel'))
+        self.assertTrue(first[0]['key'].startswith('/works/OLMOCK'))
+
+    def test_failures_return_nothing(self):
+        self.server.error_rate = 1.0
+        with mock.patch('builtins.print'):
+            self.assertEqual(OpenLibraryAPI.search_books('The Hobbit'), [])
+            self.assertIsNone(search_and_create_book('The Hobbit'))
+        self.assertEqual(self.server.stats['error'], 2)
+
+
+# Chunked purge and archival (user-040)
+
+class PurgeTests(IsolatedStateMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser('root', 'root@example.org', 'pw')
+        self.reader = User.objects.create_user('leaving', password='pw')
+        self.books = [Book.objects.create(title=f'Purge {i}') for i in range(4)]
+        for book in self.books:
+            Favorite.objects.create(user=self.reader, book=book)
+            Comment.objects.create(user=self.reader, book=book, content='Bye')
+            Comment.objects.create(user=self.admin, book=book, content='Stays')
+        self.client.force_login(self.admin)
+
+    def delete_url(self, user):
+        return reverse('admin:auth_user_delete', args=[user.pk])
+
+    def test_confirmation_page_shows_counts(self):
+        response = self.client.get(self.delete_url(self.reader))
+        self.assertEqual(dict(response.context['model_count'])['comments'], 4)
+        self.assertEqual(dict(response.context['model_count'])['favorites'], 4)
+        self.assertIn('Comments: 4', response.context['deleted_objects'])
+
+    def test_admin_delete_commits_chunks_outside_the_request_transaction(self):
+        depth = len(connection.atomic_blocks)
+        seen = []
+
+        def record(obj, *args, **kwargs):
+            seen.append(len(connection.atomic_blocks))
+            return purge.stream_delete(obj, chunk_size=3)
+
+        with mock.patch('books.admin.stream_delete', side_effect=record):
+            response = self.client.post(self.delete_url(self.reader), {'post': 'yes'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(seen, [depth])
+        self.assertFalse(User.objects.filter(pk=self.reader.pk).exists())
+        self.assertEqual(Comment.objects.count(), 4)
+        self.assertEqual(stats.get_stats()['totals']['comments'], 4)
+
+    def test_delete_selected_action(self):
+        response = self.client.post(reverse('admin:books_book_changelist'), {
+            'action': 'delete_selected',
+            '_selected_action': [book.pk for book in self.books[:3]],
+            'post': 'yes',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(list(Book.objects.values_list('pk', flat=True)), [self.books[3].pk])
+        self.assertEqual(Comment.objects.count(), 2)
+
+    def test_stream_delete_counts(self):
+        counts = purge.stream_delete(self.reader, chunk_size=3)
+        self.assertEqual(counts['books.Comment'], 4)
+        self.assertEqual(counts['books.Favorite'], 4)
+        self.assertEqual(counts['auth.User'], 1)
+
+    def test_purge_command(self):
+        out = StringIO()
+        call_command('purge', '--users', str(self.reader.pk), '999', '--chunk-size', '2', stdout=out, stderr=StringIO())
+        self.assertIn('4 books.Comment', out.getvalue())
+        self.assertFalse(Favorite.objects.exists())
+
+    def test_archive_then_delete_old_comments(self):
+        Comment.objects.filter(user=self.reader).update(created_at=timezone.now() - timedelta(days=400))
+        result = purge.archive_comments(timezone.now() - timedelta(days=365), chunk_size=3)
+        self.assertEqual((result['archived'], result['deleted']), (4, 4))
+        with gzip.open(result['path'], 'rt') as archive:
+            rows = [json.loads(line) for line in archive]
+        self.assertEqual({row['user__username'] for row in rows}, {'leaving'})
+        self.assertEqual(Comment.objects.count(), 4)
+        self.assertEqual(stats.get_stats()['totals']['comments'], 4)
@@ -0,0 +1,144 @@
+import time
+from functools import wraps
+from typing import Dict, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from rest_framework import throttling
+
+
+def _cache():
+    return caches[getattr(settings, 'THROTTLE_CACHE', 'default')]
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    num, period = rate.split('/')
+    return int(num), {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+
+
+def hit(key: str, limit: int, window: int) -> Tuple[bool, float]:
+    """
+    Count one request against a sliding-window limit.
+
+    Uses two fixed-window counters and weights the previous one by how much of
+    it still overlaps the sliding window, so each check is two cache reads and
+    one increment regardless of the rate. Returns ``(allowed, retry_after)``.
+    """
+    cache = _cache()
+    now = time.time()
+    current = int(now // window)
+    elapsed = (now % window) / window
+    current_key = f'throttle:{key}:{current}'
+    previous_key = f'throttle:{key}:{current - 1}'
+
+    counts = cache.get_many([current_key, previous_key])
+    current_count = counts.get(current_key, 0)
+    previous_count = counts.get(previous_key, 0)
+
+    if previous_count * (1 - elapsed) + current_count >= limit:
+        if current_count < limit and previous_count:
+            # Wait until enough of the previous window has slid out.
+            retry_after = (1 - (limit - current_count) / previous_count - elapsed) * window
+        else:
+            retry_after = (1 - elapsed) * window
+        return False, max(retry_after, 1)
+
+    if not cache.add(current_key, 1, timeout=window * 2):
+        try:
+            cache.incr(current_key)
+        except ValueError:
+            cache.set(current_key, 1, timeout=window * 2)
+    return True, 0
+
+
+def record(scope: str, allowed: bool) -> None:
+    cache = _cache()
+    key = f'throttle-metrics:{scope}:{"allowed" if allowed else "throttled"}'
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def get_metrics() -> Dict[str, Dict[str, int]]:
+    scopes = list(getattr(settings, 'THROTTLE_RATES', {}))
+    scopes += list(settings.REST_FRAMEWORK.get('DEFAULT_THROTTLE_RATES', {}))
+    keys = {
+        f'throttle-metrics:{scope}:{outcome}': (scope, outcome)
+        for scope in scopes
+        for outcome in ('allowed', 'throttled')
+    }
+    values = _cache().get_many(list(keys))
+    metrics = {scope: {'allowed': 0, 'throttled': 0} for scope in scopes}
+    for key, count in values.items():
+        scope, outcome = keys[key]
+        metrics[scope][outcome] = count
+    return metrics
+
+
+def too_many_requests(retry_after: float) -> HttpResponse:
+    response = HttpResponse(
+        'Too many requests. Please try again later.',
+        status=429,
+        content_type='text/plain',
+    )
+    response['Retry-After'] = str(int(retry_after + 0.999))
+    return response
+
+
+def throttle(scope: str, methods=('GET', 'POST')):
+    """
+    Rate-limit a view per client IP, then per signed-in user.
+
+    The IP check runs before the session or user is loaded, so a throttled
+    client costs no database work at all.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            rate = getattr(settings, 'THROTTLE_RATES', {}).get(scope)
+            if rate is None or request.method not in methods:
+                return view(request, *args, **kwargs)
+
+            limit, window = parse_rate(rate)
+            ident = throttling.BaseThrottle().get_ident(request)
+            allowed, retry_after = hit(f'{scope}:ip:{ident}', limit, window)
+
+            if allowed and settings.SESSION_COOKIE_NAME in request.COOKIES and request.user.is_authenticated:
+                allowed, retry_after = hit(f'{scope}:user:{request.user.pk}', limit, window)
+
+            record(scope, allowed)
+            if not allowed:
+                return too_many_requests(retry_after)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class SlidingWindowThrottleMixin:
+    """Swap DRF's per-request timestamp list for the shared sliding-window counter."""
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+
+        allowed, self.retry_after = hit(key, self.num_requests, self.duration)
+        record(self.scope, allowed)
+        return allowed
+
+    def wait(self):
+        return self.retry_after
+
+
+class AnonRateThrottle(SlidingWindowThrottleMixin, throttling.AnonRateThrottle):
+    pass
+
+
+class UserRateThrottle(SlidingWindowThrottleMixin, throttling.UserRateThrottle):
+    pass
@@ -9,7 +9,11 @@ urlpatterns = [
     path('authors/', views.authors, name='authors'),
     path('author/<int:author_id>/', views.author_books, name='author_books'),
     path('search/', views.search, name='search'),
+    path('api/autocomplete/', views.autocomplete, name='autocomplete'),
+    path('api/throttle-metrics/', views.throttle_metrics, name='throttle_metrics'),
     path('api/books/', views.BookListAPIView.as_view(), name='api_books'),
+    path('api/stats/', views.stats_api, name='stats_api'),
+    path('api/changes/', views.ChangeFeedAPIView.as_view(), name='api_changes'),
     path('register/', views.register_view, name='register'),
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
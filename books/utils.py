@@ -1,16 +1,30 @@
-import requests
 import json
 from typing import Dict, List, Optional
+from django.conf import settings
+from django.utils.functional import classproperty
 from .models import Book, Author
 
 
 class OpenLibraryAPI:
-    BASE_URL = "https://openlibrary.org"
-    SEARCH_URL = f"{BASE_URL}/search.json"
-    COVERS_URL = "https://covers.openlibrary.org/b"
+    # Read from settings on each use so tests and load runs can point at a stand-in server.
+    @classproperty
+    def BASE_URL(cls):
+        return settings.OPEN_LIBRARY_BASE_URL.rstrip('/')
+
+    @classproperty
+    def SEARCH_URL(cls):
+        return f"{cls.BASE_URL}/search.json"
+
+    @classproperty
+    def COVERS_URL(cls):
+        return settings.OPEN_LIBRARY_COVERS_URL.rstrip('/')
 
     @classmethod
     def search_books(cls, title: str, limit: int = 5) -> List[Dict]:
+        # Imported lazily: requests is only needed by admin imports and adds
+        # noticeably to every worker's startup time and memory.
+        import requests
+
         try:
             params = {
                 'title': title,
@@ -18,7 +32,7 @@ class OpenLibraryAPI:
                 'fields': 'key,title,author_name,first_publish_year,isbn,cover_i,subject'
             }
 
-            response = requests.get(cls.SEARCH_URL, params=params, timeout=10)
+            response = requests.get(cls.SEARCH_URL, params=params, timeout=settings.OPEN_LIBRARY_TIMEOUT)
             response.raise_for_status()
 
             data = response.json()
@@ -30,9 +44,11 @@ class OpenLibraryAPI:
 
     @classmethod
     def get_book_details(cls, open_library_key: str) -> Optional[Dict]:
+        import requests
+
         try:
             url = f"{cls.BASE_URL}{open_library_key}.json"
-            response = requests.get(url, timeout=10)
+            response = requests.get(url, timeout=settings.OPEN_LIBRARY_TIMEOUT)
             response.raise_for_status()
 
             return response.json()
@@ -43,9 +59,11 @@ class OpenLibraryAPI:
 
     @classmethod
     def get_author_details(cls, author_key: str) -> Optional[Dict]:
+        import requests
+
         try:
             url = f"{cls.BASE_URL}{author_key}.json"
-            response = requests.get(url, timeout=10)
+            response = requests.get(url, timeout=settings.OPEN_LIBRARY_TIMEOUT)
             response.raise_for_status()
 
             return response.json()
@@ -1,16 +1,30 @@
+import math
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.core.paginator import Paginator
-from django.db.models import Q, Count
+from django.db.models import Count
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
-from django.contrib.auth.models import User
 from django.contrib import messages
-from rest_framework import generics
-from .models import Book, Author, Comment, Favorite
-from .serializers import BookSerializer
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.urls import reverse
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from . import autocomplete as autocomplete_index
+from . import changelog
+from . import snapshot
+from .page_cache import anonymous_page_cache
+from .search_results import get_results as get_search_results, normalize_query
+from .stats import get_stats
+from .throttling import throttle, get_metrics as get_throttle_metrics
+from .models import Book, Author, Comment, Favorite, Recommendation
+from .serializers import BookSerializer, book_list_rows, dump_json
 from .forms import CustomUserCreationForm, LoginForm, CommentForm
 
 
+@anonymous_page_cache
 def home(request):
     
     if request.user.is_authenticated:
@@ -20,18 +34,23 @@ def home(request):
             return redirect('books:user_dashboard')
 
     # For anonymous users - show public home page
-    books_list = Book.objects.all().prefetch_related('authors')
+    catalog = snapshot.get_current() if snapshot.is_enabled() else None
+    if catalog is not None:
+        books_list = catalog
+        total_books = catalog.total_books
+        total_authors = catalog.total_authors
+        latest_year = catalog.latest_year or 'N/A'
+    else:
+        books_list = Book.objects.all().prefetch_related('authors')
+        total_books = Book.objects.count()
+        total_authors = Author.objects.count()
+        latest_book = Book.objects.filter(publication_year__isnull=False).order_by('-publication_year').first()
+        latest_year = latest_book.publication_year if latest_book else 'N/A'
 
     paginator = Paginator(books_list, 10)
     page_number = request.GET.get('page')
     books = paginator.get_page(page_number)
 
-    total_books = Book.objects.count()
-    total_authors = Author.objects.count()
-
-    latest_book = Book.objects.filter(publication_year__isnull=False).order_by('-publication_year').first()
-    latest_year = latest_book.publication_year if latest_book else 'N/A'
-
     context = {
         'books': books,
         'total_books': total_books,
@@ -83,6 +102,7 @@ def book_detail(request, book_id):
     return render(request, 'books/book_detail.html', context)
 
 
+@anonymous_page_cache(params=('page', 'search'))
 def authors(request):
     authors_list = Author.objects.annotate(
         book_count=Count('books')
@@ -127,35 +147,133 @@ def author_books(request, author_id):
     return render(request, 'books/author_books.html', context)
 
 
+@throttle('search')
 def search(request):
     query = request.GET.get('q', '').strip()
-    books = Book.objects.none()
-    authors = Author.objects.none()
-
-    if query:
-        books = Book.objects.filter(
-            Q(title__icontains=query) |
-            Q(authors__name__icontains=query)
-        ).distinct().prefetch_related('authors')
-
-        authors = Author.objects.filter(
-            name__icontains=query
-        ).annotate(book_count=Count('books')).filter(book_count__gt=0)
+    books_page = None
+    authors = []
+    truncated = False
+
+    # The folded form is only for matching and the cache key; the page
+    # echoes the query as typed.
+    normalized = normalize_query(query)
+    if normalized:
+        results = get_search_results(normalized)
+        authors = results['authors']
+        truncated = results['truncated']
+        paginator = Paginator(results['books'], 12)
+        books_page = paginator.get_page(request.GET.get('page'))
 
     context = {
         'query': query,
-        'books': books,
-        'authors': authors,
+        'books': books_page,
+        'authors': authors if books_page is None or books_page.number == 1 else [],
+        'book_count': books_page.paginator.count if books_page else 0,
+        'author_count': len(authors),
+        'truncated': truncated,
+        'is_paginated': books_page is not None and books_page.has_other_pages(),
+        'page_obj': books_page,
     }
 
     return render(request, 'books/search.html', context)
 
 
+def autocomplete(request):
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 50)
+    except ValueError:
+        limit = 10
+    kind = request.GET.get('type')
+    if kind not in ('book', 'author'):
+        kind = None
+
+    results = autocomplete_index.get_index().search(query, limit=limit, kind=kind)
+    for result in results:
+        if result['type'] == 'book':
+            result['url'] = reverse('books:book_detail', kwargs={'book_id': result['id']})
+        else:
+            result['url'] = reverse('books:author_books', kwargs={'author_id': result['id']})
+
+    return JsonResponse({'query': query, 'results': results})
+
+
+def throttle_metrics(request):
+    if not request.user.is_authenticated or not request.user.is_staff:
+        return JsonResponse({'detail': 'Staff access required.'}, status=403)
+    return JsonResponse({'throttles': get_throttle_metrics()})
+
+
 class BookListAPIView(generics.ListAPIView):
     queryset = Book.objects.all().prefetch_related('authors')
     serializer_class = BookSerializer
 
+    def list(self, request, *args, **kwargs):
+        if not settings.BOOK_API_FAST_PATH or request.accepted_renderer.format != 'json':
+            return super().list(request, *args, **kwargs)
 
+        # Same payload as BookSerializer, built from plain tuples and encoded directly.
+        rows = Book.objects.values_list('id', 'title', 'publication_year')
+        page = self.paginate_queryset(rows)
+        if page is None:
+            data = book_list_rows(list(rows))
+        else:
+            data = {
+                'count': self.paginator.page.paginator.count,
+                'next': self.paginator.get_next_link(),
+                'previous': self.paginator.get_previous_link(),
+                'results': book_list_rows(page),
+            }
+        return HttpResponse(dump_json(data), content_type='application/json')
+
+
+class ChangeFeedAPIView(APIView):
+    """
+    Cursor-based feed of catalog changes for integrations.
+
+    ``?cursor=<id>`` returns entries after that id (oldest first), and
+    ``&wait=<seconds>`` long-polls until at least one arrives. Pass the
+    returned ``cursor`` back on the next call.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        try:
+            cursor = max(int(request.query_params.get('cursor', 0)), 0)
+            limit = min(max(int(request.query_params.get('limit', 100)), 1), 1000)
+            wait = float(request.query_params.get('wait', 0))
+            if not math.isfinite(wait):
+                # nan slips through min()/max() and would poll forever
+                raise ValueError(wait)
+        except ValueError:
+            return Response({'detail': 'cursor, limit and wait must be numbers.'}, status=status.HTTP_400_BAD_REQUEST)
+        wait = min(max(wait, 0), settings.CHANGE_FEED_MAX_WAIT)
+
+        models = [name for name in request.query_params.get('models', '').split(',') if name]
+        unknown = set(models) - set(changelog.MODEL_NAMES)
+        if unknown:
+            return Response(
+                {'detail': f'Unknown models: {", ".join(sorted(unknown))}.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if cursor and cursor < changelog.horizon():
+            # Deletes after this cursor were compacted away; the consumer must resync.
+            return Response(
+                {'detail': 'Cursor is older than the compacted log; reload /api/books/ and restart from cursor.',
+                 'cursor': changelog.head()},
+                status=status.HTTP_410_GONE,
+            )
+
+        entries, cursor, has_more = changelog.poll(cursor, limit, models, wait)
+        return Response({
+            'changes': [changelog.to_dict(entry) for entry in entries],
+            'cursor': cursor,
+            'has_more': has_more,
+        })
+
+
+@throttle('register', methods=('POST',))
 def register_view(request):
     if request.user.is_authenticated:
         return redirect('books:home')
@@ -173,6 +291,7 @@ def register_view(request):
     return render(request, 'books/register.html', {'form': form})
 
 
+@throttle('login', methods=('POST',))
 def login_view(request):
     if request.user.is_authenticated:
         return redirect('books:home')
@@ -221,9 +340,18 @@ def user_dashboard(request):
     page_number = request.GET.get('page')
     all_books = paginator.get_page(page_number)
 
+    # Precomputed by books.recommendations whenever favorites change
+    recommended_books = [
+        recommendation.book
+        for recommendation in Recommendation.objects.filter(
+            user=request.user
+        ).select_related('book').prefetch_related('book__authors')
+    ]
+
     context = {
         'user': request.user,
         'favorite_books': favorite_books,
+        'recommended_books': recommended_books,
         'all_books': all_books,
         'total_favorites': favorite_books.count(),
         'total_books': Book.objects.count(),
@@ -239,22 +367,21 @@ def admin_dashboard(request):
     if not request.user.is_authenticated or not request.user.is_staff:
         return redirect('books:home')
 
-    
-    total_books = Book.objects.count()
-    total_authors = Author.objects.count()
-    total_users = User.objects.count()
-    total_comments = Comment.objects.count()
+    # Precomputed by books.stats; no aggregate queries over the catalog here
+    statistics = get_stats()
+    totals = statistics['totals']
 
     
-    recent_books = Book.objects.all().order_by('-created_at')[:5]
+    recent_books = Book.objects.all().prefetch_related('authors').order_by('-created_at')[:5]
     recent_comments = Comment.objects.all().select_related('user', 'book').order_by('-created_at')[:5]
 
     context = {
         'user': request.user,
-        'total_books': total_books,
-        'total_authors': total_authors,
-        'total_users': total_users,
-        'total_comments': total_comments,
+        'total_books': totals['books'],
+        'total_authors': totals['authors'],
+        'total_users': totals['users'],
+        'total_comments': totals['comments'],
+        'stats': statistics,
         'recent_books': recent_books,
         'recent_comments': recent_comments,
     }
@@ -262,9 +389,18 @@ def admin_dashboard(request):
     return render(request, 'books/admin_dashboard.html', context)
 
 
+def stats_api(request):
+    if not request.user.is_authenticated or not request.user.is_staff:
+        return JsonResponse({'detail': 'Staff access required.'}, status=403)
+    return JsonResponse(get_stats())
+
+
+@anonymous_page_cache
 def all_books(request):
     
-    books_list = Book.objects.all().prefetch_related('authors')
+    books_list = snapshot.get_current() if snapshot.is_enabled() else None
+    if books_list is None:
+        books_list = Book.objects.all().prefetch_related('authors')
 
     paginator = Paginator(books_list, 12)
     page_number = request.GET.get('page')
@@ -272,7 +408,7 @@ def all_books(request):
 
     context = {
         'books': books,
-        'total_books': Book.objects.count(),
+        'total_books': paginator.count,
         'is_paginated': books.has_other_pages(),
         'page_obj': books,
     }